@@ -0,0 +1,25 @@
+# NomadicSky: a weather assistant for nomads.
+# The tool functions import without the LLM stack; LangChain and the xAI client are only
+# loaded when create_agent() builds an agent. Run the demo with `python -m nomadicsky`.
+from .agent import PreprocessedAgentExecutor, astream_answer, build_tools, create_agent, preprocess_query
+from .cache import response_cache
+from .geocoding import geocode_city
+from .historical import aget_historical_weather, get_historical_weather
+from .http_client import get_provider_stats
+from .memo import memo_scope
+from .places import afind_warm_places, asearch_warm_places, find_warm_places, search_warm_places, stream_warm_places
+from .preference_tools import aget_user_preferences, aupdate_user_preferences, get_user_preferences, update_user_preferences
+from .preferences import (
+    InMemoryPreferenceBackend, JsonFilePreferenceBackend, PreferenceBackend, SQLitePreferenceBackend,
+    all_preferred_cities, current_user_id, read_user_prefs, set_preference_backend, users_with_preferred_city,
+    write_user_prefs
+)
+from .prewarm import CachePrewarmer, start_prewarmer, stop_prewarmer
+from .providers import aggregate_forecasts, get_location_weather
+from .records import CurrentConditions, DailySummary, ForecastSeries, LocationWeather
+from .route import aget_route_weather, get_route_weather
+from .router import aroute_query, route_query
+from .telemetry import (
+    InMemorySink, MetricsSink, OpenTelemetrySink, prometheus_text, set_telemetry_sink, start_trace, telemetry_sink
+)
+from .weather import aget_current_weather, aget_weather_forecast, get_current_weather, get_weather_forecast
@@ -0,0 +1,56 @@
+import argparse
+import json
+import sys
+
+from .agent import create_agent
+from .telemetry import prometheus_text
+
+# End-to-end demo queries, run when no query is given on the command line
+DEMO_QUERIES = [
+    # Reset preferences for a clean test
+    "I like Knoxville",
+    "I like Tucson",
+    "I like sunny weather",
+    "I prefer warm weather",
+    # Current weather queries
+    "What's the weather in Knoxville?",
+    "What's the weather in my preferred cities?",
+    # Historical weather queries
+    "What were the average highs and lows in Knoxville in June?",
+    "What were the average highs and lows in Tucson in December?",
+    # Forecast weather queries
+    "What's the forecast for Knoxville?",
+    "What's the forecast for my preferred cities?",
+    # Combined queries
+    "What's the weather in Knoxville today, and what's the forecast for the next few days?",
+    "Compare the weather in Knoxville and Tucson this week.",
+    # Edge cases
+    "What's the forecast for InvalidCity?",
+    "I like InvalidCity",
+    # Preference management
+    "What are my preferences?"
+]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="nomadicsky", description="Weather assistant for nomads.")
+    parser.add_argument("queries", nargs="*", help="queries to answer (default: run the demo queries)")
+    parser.add_argument("--user", default=None, help="user ID whose preferences to use")
+    parser.add_argument("--quiet", action="store_true", help="don't print the agent's intermediate steps")
+    parser.add_argument("--trace", action="store_true", help="print each query's telemetry summary")
+    parser.add_argument("--metrics", action="store_true", help="print the metrics in Prometheus text format at the end")
+    args = parser.parse_args(argv)
+
+    agent_executor = create_agent({"verbose": not args.quiet})
+    for query in args.queries or DEMO_QUERIES:
+        print(f"\nQuery: {query}")
+        response = agent_executor.invoke({"input": query, "user_id": args.user})
+        print(f"Response: {response['output']}")
+        if args.trace:
+            print(f"Trace: {json.dumps(response['trace'], indent=2)}")
+    if args.metrics:
+        print(prometheus_text(), end="")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,334 @@
+import asyncio
+import contextvars
+import functools
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .config import load_api_key
+from .historical import aget_historical_weather, get_historical_weather
+from .memo import compact_tool_output, memo_scope
+from .places import asearch_warm_places, search_warm_places
+from .preference_tools import (
+    aget_user_preferences, aupdate_user_preferences, get_user_preferences, update_user_preferences
+)
+from .preferences import DEFAULT_USER_ID, current_user_id
+from .prewarm import PREWARM_ENABLED, start_prewarmer
+from .route import aget_route_weather, get_route_weather
+from .router import aroute_query, route_query
+from .telemetry import llm_callback_handler, span, start_trace
+from .weather import aget_current_weather, aget_weather_forecast, get_current_weather, get_weather_forecast
+
+# LangChain and the xAI client are imported inside build_tools()/create_agent(), so the
+# tool functions and this module can be imported without loading the LLM stack.
+SYSTEM_PROMPT = "You are a weather assistant for nomads. Use the tools to answer weather-related queries conversationally. For historical weather, provide the average highs and lows in a clear, friendly format, mentioning the years and weather station they come from. For weather forecasts, include the daily average temperature, high, low, most frequent weather condition, and any notable chance of precipitation or strong wind in a detailed, friendly response. Use the get_user_preferences tool to check user preferences when relevant (e.g., for queries like 'What's the weather in my preferred cities?', check preferred cities and apply preferences). For direct single-city weather queries (e.g., 'What's the weather in Knoxville?'), use weather_lookup directly without checking preferences unless explicitly asked. You can also store user preferences like preferred cities or temperature preferences using the update_user_preferences tool. For combined queries, break them down into separate tool calls: e.g., for 'What's the weather in Knoxville today, and what's the forecast for the next few days?', first use weather_lookup to get current weather, then use forecast_weather to get the forecast. For comparison queries (e.g., 'Compare the weather in Knoxville and Tucson this week'), invoke forecast_weather for each city separately (e.g., call forecast_weather for Knoxville, then for Tucson), and summarize the results. For trips or drives between places (e.g., 'What's the weather on my drive from Knoxville to Memphis tomorrow?'), use route_weather with the waypoints in order and the departure time. If a query involves both current weather and forecast, split it into two steps: use weather_lookup for 'today' and forecast_weather for future days. Always provide clear, actionable responses tailored for nomads on the move. If a query requires multiple steps, execute them sequentially and summarize the findings in a single response. If a query is preprocessed into simpler parts (e.g., 'What's the forecast for Knoxville?' and 'What's the forecast for Tucson?'), handle each part directly without attempting to combine tools like 'forecast_weatherforecast_weather'."
+
+# The agent gets tool results as compact JSON rather than Python reprs or formatted text,
+# which keeps the prompt short on later iterations
+def _compact(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return compact_tool_output(func(*args, **kwargs))
+    return wrapper
+
+def _acompact(coroutine):
+    @functools.wraps(coroutine)
+    async def wrapper(*args, **kwargs):
+        return compact_tool_output(await coroutine(*args, **kwargs))
+    return wrapper
+
+# Create LangChain Tools
+def build_tools():
+    from langchain.tools import Tool
+
+    weather_tool = Tool(
+        name="weather_lookup",
+        func=_compact(get_current_weather),
+        coroutine=_acompact(aget_current_weather),
+        description="Fetches current weather for a given location. Input can be a city name (e.g., 'Knoxville') or city,state,country (e.g., 'Knoxville,TN,US')."
+    )
+
+    warm_places_tool = Tool(
+        name="find_warm_places",
+        func=_compact(search_warm_places),
+        coroutine=_acompact(asearch_warm_places),
+        description="Finds warm places (temp >= 75°F) among a catalog of nomad-friendly locations, warmest first and those matching the user's weather condition preference at the top. Can be limited to a radius around a city or to a corridor along a route (50 miles either side by default). Input examples: 'Find warm places', 'warm places within 300 miles of Knoxville', 'warm places near Tucson', 'warm places along the route from Knoxville to Tucson', 'warm places within 30 miles of the route from Nashville to Memphis'."
+    )
+
+    historical_weather_tool = Tool(
+        name="historical_weather",
+        func=_compact(get_historical_weather),
+        coroutine=_acompact(aget_historical_weather),
+        description="Fetches historical weather highs and lows for a given location and month (e.g., 'Knoxville June') from the nearest NOAA weather station. Returns average high and low temperatures for that month over the last few complete years; add a year (e.g., 'Knoxville June 2023') for a single year."
+    )
+
+    forecast_weather_tool = Tool(
+        name="forecast_weather",
+        func=_compact(get_weather_forecast),
+        coroutine=_acompact(aget_weather_forecast),
+        description="Fetches a 5-day weather forecast for a given location, summarizing each local day's average, high and low temperature, most frequent weather condition, chance of precipitation, maximum wind speed and average humidity. Input example: 'Knoxville'."
+    )
+
+    route_weather_tool = Tool(
+        name="route_weather",
+        func=_compact(get_route_weather),
+        coroutine=_acompact(aget_route_weather),
+        description="Fetches the weather along an RV travel route for the estimated time of arrival at each point, sampled every ~50 miles, plus the arrival-day forecast at each stop. Input: waypoints separated by '->' with an optional local departure time, e.g., 'Knoxville -> Nashville -> Memphis, depart 2025-06-04 08:00', or JSON like {\"polyline\": [[35.96, -83.92], [36.16, -86.78]], \"depart\": \"2025-06-04 08:00\", \"speed_mph\": 55}."
+    )
+
+    update_preferences_tool = Tool(
+        name="update_user_preferences",
+        func=update_user_preferences,
+        coroutine=aupdate_user_preferences,
+        description="Updates user preferences, such as preferred cities, temperature preferences, or weather conditions. Validates cities before adding them. Input examples: 'I like Knoxville', 'I like sunny weather', 'I prefer warm weather'."
+    )
+
+    get_preferences_tool = Tool(
+        name="get_user_preferences",
+        func=get_user_preferences,
+        coroutine=aget_user_preferences,
+        description="Retrieves the user's stored preferences and proactively provides weather updates or forecasts for preferred cities, noting if they match temperature and weather condition preferences. Handles forecast queries for preferred cities. Input examples: 'What are my preferences?', 'What's the weather like?', 'What's the forecast for my preferred cities?'."
+    )
+
+    return [weather_tool, warm_places_tool, historical_weather_tool, forecast_weather_tool, route_weather_tool, update_preferences_tool, get_preferences_tool]
+
+# Create a conversational prompt
+def build_prompt():
+    from langchain.prompts import ChatPromptTemplate
+
+    return ChatPromptTemplate.from_messages([
+        ("system", SYSTEM_PROMPT),
+        ("human", "{input}"),
+        ("assistant", "{agent_scratchpad}")
+    ])
+
+# Preprocess queries to handle combined queries explicitly
+_COMPARISON_PATTERN = re.compile(
+    r"compare (?:the )?(?:weather|forecasts?|temperatures?)? ?(?:in|for|between|of) (.+?)"
+    r"(?: this week| over the next few days| for the next few days| right now| today)?[?.!]*$",
+    re.IGNORECASE
+)
+_CITY_LIST_SEPARATOR = re.compile(r"\s*,\s*(?:and\s+)?|\s+and\s+|\s+vs\.?\s+|\s+versus\s+", re.IGNORECASE)
+
+def preprocess_query(query):
+    # Handle "today and forecast" queries
+    if "today" in query.lower() and "forecast" in query.lower():
+        # Split into two queries
+        try:
+            city = query.lower().split("in ")[1].split(" today")[0].strip()
+            return {"type": "today_and_forecast", "city": city, "queries": [
+                f"What's the weather in {city}?",
+                f"What's the forecast for {city}?"
+            ]}
+        except IndexError:
+            return {"type": "single", "queries": [query]}
+    # Handle comparison queries between any number of cities
+    if "compare" in query.lower():
+        match = _COMPARISON_PATTERN.search(query.strip())
+        if match:
+            cities = [city.strip() for city in _CITY_LIST_SEPARATOR.split(match.group(1)) if city.strip()]
+            if len(cities) >= 2:
+                return {"type": "comparison", "cities": cities, "queries": [
+                    f"What's the forecast for {city}?" for city in cities
+                ]}
+        return {"type": "single", "queries": [query]}
+    # Default: return original query as a single-item list
+    return {"type": "single", "queries": [query]}
+
+# Wrap the agent executor to handle preprocessed queries. Sub-queries run concurrently (up to
+# max_concurrency at a time), each through the fast path or the agent; stream()/astream()
+# yield each sub-query's answer as soon as it is ready, followed by the combined output.
+# Each query runs in one tool memo scope, so repeated tool calls within it are fetched once.
+SUBQUERY_CONCURRENCY = int(os.environ.get("NOMADICSKY_SUBQUERY_CONCURRENCY", 4))
+
+class PreprocessedAgentExecutor:
+    def __init__(self, executor, fast_path=True, max_concurrency=SUBQUERY_CONCURRENCY):
+        self.executor = executor
+        self.fast_path = fast_path
+        self.max_concurrency = max_concurrency
+
+    def _answer(self, query):
+        with span("query", "fast_path", query=query) as record:
+            output = route_query(query) if self.fast_path else None
+            if output is None:
+                record.name = "agent"
+                output = self.executor.invoke({"input": query}, config={"callbacks": [llm_callback_handler()]})["output"]
+        return output
+
+    async def _aanswer(self, query):
+        with span("query", "fast_path", query=query) as record:
+            output = await aroute_query(query) if self.fast_path else None
+            if output is None:
+                record.name = "agent"
+                output = (await self.executor.ainvoke({"input": query},
+                                                      config={"callbacks": [llm_callback_handler()]}))["output"]
+        return output
+
+    def _combine(self, preprocessed, responses):
+        if preprocessed["type"] == "today_and_forecast":
+            city = preprocessed["city"]
+            return {"output": f"Let’s break this down for {city.capitalize()}!\n\n**Today’s Weather:**\n{responses[0]}\n\n**Forecast for the Next Few Days:**\n{responses[1]}"}
+        elif preprocessed["type"] == "comparison":
+            cities = [city[:1].upper() + city[1:] for city in preprocessed["cities"]]
+            names = ", ".join(cities[:-1]) + f" and {cities[-1]}"
+            sections = "\n\n".join(f"**{city} Forecast:**\n{response}" for city, response in zip(cities, responses))
+            return {"output": f"Here's a comparison of the weather in {names}:\n\n{sections}"}
+        return {"output": responses[0]}
+
+    def _partial(self, preprocessed, index, output):
+        partial = {"index": index, "query": preprocessed["queries"][index], "output": output}
+        if preprocessed["type"] == "comparison":
+            partial["city"] = preprocessed["cities"][index]
+        return partial
+
+    # Returns {"output", "trace"}, where trace is the query's telemetry summary
+    def invoke(self, input_dict):
+        result = None
+        for chunk in self.stream(input_dict):
+            result = chunk
+        return {"output": result["output"], "trace": result["trace"]}
+
+    # Yields {"index", "query", "output"} per sub-query as it finishes, then
+    # {"output": combined, "final": True, "trace": telemetry summary}
+    def stream(self, input_dict):
+        # Tools read and update preferences for this user
+        token = current_user_id.set(input_dict.get("user_id") or DEFAULT_USER_ID)
+        try:
+            with start_trace(input_dict["input"]) as trace, memo_scope():
+                preprocessed = preprocess_query(input_dict["input"])
+                queries = preprocessed["queries"]
+                responses = [None] * len(queries)
+                if len(queries) == 1:
+                    responses[0] = self._answer(queries[0])
+                else:
+                    with ThreadPoolExecutor(max_workers=min(len(queries), self.max_concurrency)) as pool:
+                        futures = {
+                            pool.submit(contextvars.copy_context().run, self._answer, query): index
+                            for index, query in enumerate(queries)
+                        }
+                        for future in as_completed(futures):
+                            index = futures[future]
+                            responses[index] = future.result()
+                            yield self._partial(preprocessed, index, responses[index])
+                yield dict(self._combine(preprocessed, responses), final=True, trace=trace.summary())
+        finally:
+            current_user_id.reset(token)
+
+    # Async generator of agent events as they happen:
+    #   {"type": "tool_start", "tool", "input"} / {"type": "tool_end", "tool", "output"}
+    #   {"type": "token", "content"} for each answer token from the model
+    #   {"type": "partial", "index", "query", "output"} for each finished sub-query of a split query
+    #   {"type": "answer", "output", "trace"} once, at the end
+    # Fast-path answers arrive as a single "answer" event.
+    async def astream_events(self, input_dict):
+        token = current_user_id.set(input_dict.get("user_id") or DEFAULT_USER_ID)
+        try:
+            preprocessed = preprocess_query(input_dict["input"])
+            if len(preprocessed["queries"]) > 1:
+                async for chunk in self.astream(input_dict):
+                    if chunk.get("final"):
+                        yield {"type": "answer", "output": chunk["output"], "trace": chunk["trace"]}
+                    else:
+                        yield dict(chunk, type="partial")
+                return
+            query = preprocessed["queries"][0]
+            with start_trace(input_dict["input"]) as trace, memo_scope():
+                with span("query", "fast_path", query=query) as record:
+                    output = await aroute_query(query) if self.fast_path else None
+                    if output is None:
+                        record.name = "agent"
+                        events = self.executor.astream_events({"input": query}, version="v2",
+                                                              config={"callbacks": [llm_callback_handler()]})
+                        async for event in events:
+                            kind = event["event"]
+                            if kind == "on_chat_model_stream":
+                                content = event["data"]["chunk"].content
+                                if isinstance(content, str) and content:
+                                    yield {"type": "token", "content": content}
+                            elif kind == "on_tool_start":
+                                yield {"type": "tool_start", "tool": event["name"], "input": event["data"].get("input")}
+                            elif kind == "on_tool_end":
+                                yield {"type": "tool_end", "tool": event["name"], "output": event["data"].get("output")}
+                            elif kind == "on_chain_end" and not event.get("parent_ids"):
+                                output = event["data"]["output"]["output"]
+                yield {"type": "answer", "output": output, "trace": trace.summary()}
+        finally:
+            current_user_id.reset(token)
+
+    async def ainvoke(self, input_dict):
+        result = None
+        async for chunk in self.astream(input_dict):
+            result = chunk
+        return {"output": result["output"], "trace": result["trace"]}
+
+    async def astream(self, input_dict):
+        token = current_user_id.set(input_dict.get("user_id") or DEFAULT_USER_ID)
+        try:
+            with start_trace(input_dict["input"]) as trace, memo_scope():
+                preprocessed = preprocess_query(input_dict["input"])
+                queries = preprocessed["queries"]
+                responses = [None] * len(queries)
+                semaphore = asyncio.Semaphore(self.max_concurrency)
+
+                async def answer(index, query):
+                    async with semaphore:
+                        return index, await self._aanswer(query)
+
+                if len(queries) == 1:
+                    responses[0] = await self._aanswer(queries[0])
+                else:
+                    for next_done in asyncio.as_completed([answer(index, query) for index, query in enumerate(queries)]):
+                        index, output = await next_done
+                        responses[index] = output
+                        yield self._partial(preprocessed, index, output)
+                yield dict(self._combine(preprocessed, responses), final=True, trace=trace.summary())
+        finally:
+            current_user_id.reset(token)
+
+# Agent settings; create_agent() accepts any subset. Pass "llm" to use a different chat model.
+DEFAULT_AGENT_CONFIG = {
+    "model": "grok-3-mini",
+    "api_key": None,  # defaults to GROK3_API_KEY from the environment or api_keys.txt
+    "llm": None,
+    "streaming": True,
+    "verbose": True,
+    "max_iterations": 20,
+    "fast_path": True,
+    "max_concurrency": SUBQUERY_CONCURRENCY,
+    "prewarm": PREWARM_ENABLED,  # start the background cache pre-warmer
+}
+
+# Create the agent with tools
+def create_agent(config=None):
+    from langchain.agents import AgentExecutor, create_tool_calling_agent
+
+    config = dict(DEFAULT_AGENT_CONFIG, **(config or {}))
+    llm = config["llm"]
+    if llm is None:
+        # Initialize Grok 3 API with LangChain
+        from langchain_xai import ChatXAI
+
+        llm = ChatXAI(api_key=config["api_key"] or load_api_key("GROK3_API_KEY"), model=config["model"],
+                      streaming=config["streaming"])
+    tools = build_tools()
+    agent = create_tool_calling_agent(llm=llm, tools=tools, prompt=build_prompt())
+    base_executor = AgentExecutor(agent=agent, tools=tools, verbose=config["verbose"],
+                                  max_iterations=config["max_iterations"])
+    if config["prewarm"]:
+        start_prewarmer()
+    return PreprocessedAgentExecutor(base_executor, fast_path=config["fast_path"],
+                                     max_concurrency=config["max_concurrency"])
+
+_default_agent = None
+
+# The agent used by astream_answer(), created on first use
+def get_default_agent():
+    global _default_agent
+    if _default_agent is None:
+        _default_agent = create_agent()
+    return _default_agent
+
+# Async entry point for async services: yields tool events and answer tokens as they arrive
+async def astream_answer(query, user_id=None, agent=None):
+    async for event in (agent or get_default_agent()).astream_events({"input": query, "user_id": user_id}):
+        yield event
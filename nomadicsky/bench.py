@@ -0,0 +1,441 @@
+import argparse
+import json
+import math
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+
+import requests
+import requests.adapters
+
+from . import geocoding, historical, providers
+from .cache import response_cache
+from .fanout import fetch_many
+from .geocoding import geocode_stats
+from .http_client import PROVIDERS, get_provider_stats, provider_client
+from .places import find_warm_places, load_place_index
+from .preferences import InMemoryPreferenceBackend, set_preference_backend
+from .route import get_route_weather
+from .weather import get_current_weather, get_weather_forecast
+
+# Offline benchmark harness. FakeProviderTransport is a requests adapter that stands in for
+# OpenWeatherMap and NOAA CDO, answering /weather, /forecast, /onecall, /stations and /data with
+# realistic synthetic payloads after a configurable latency, and failing a configurable share
+# of requests with 429/503. A scripted chat model stands in for Grok. Each scenario runs cold
+# (empty caches) and warm, and the report is JSON so results can be tracked over time:
+#   python -m nomadicsky.bench --latency-ms 80 --error-rate 0.02 --output bench.json
+
+DESCRIPTIONS = ["clear sky", "few clouds", "scattered clouds", "broken clouds", "overcast clouds",
+                "light rain", "moderate rain", "thunderstorm"]
+
+def _percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(math.ceil(fraction * len(ordered))) - 1)]
+
+def _latency_summary(seconds):
+    millis = [value * 1000 for value in seconds]
+    return {
+        "count": len(millis),
+        "p50": round(_percentile(millis, 0.5), 2),
+        "p95": round(_percentile(millis, 0.95), 2),
+        "max": round(max(millis), 2) if millis else 0.0,
+    }
+
+class FakeProviderTransport(requests.adapters.BaseAdapter):
+    def __init__(self, latency=0.05, jitter=0.5, error_rate=0.0, seed=7):
+        super().__init__()
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.counts = {}
+        self.bytes = 0
+        self._lock = threading.Lock()
+        self.places = {}
+        for place in load_place_index().places:
+            self.places.setdefault(place["name"].lower(), place)
+
+    def reset_counts(self):
+        with self._lock:
+            self.counts = {}
+            self.bytes = 0
+
+    def close(self):
+        pass
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        url = urllib.parse.urlparse(request.url)
+        # NOAA /data repeats stationid once per station; every other parameter appears once
+        params = {key: values if key == "stationid" else values[-1]
+                  for key, values in urllib.parse.parse_qs(url.query).items()}
+        endpoint = url.path.rsplit("/", 1)[-1]
+        with self._lock:
+            self.counts[endpoint] = self.counts.get(endpoint, 0) + 1
+            delay = self.latency * (1 + self.random.uniform(-self.jitter, self.jitter))
+            failed = self.random.random() < self.error_rate
+            status = self.random.choice((429, 503)) if failed else None
+        time.sleep(max(delay, 0))
+        if failed:
+            return self._response(request, status, {"message": "simulated failure"})
+        handler = getattr(self, f"_{endpoint}", None)
+        if handler is None:
+            return self._response(request, 404, {"message": "not found"})
+        status, body = handler(params)
+        return self._response(request, status, body)
+
+    def _response(self, request, status, body):
+        response = requests.Response()
+        response.status_code = status
+        response._content = json.dumps(body).encode()
+        response.headers["Content-Type"] = "application/json"
+        response.url = request.url
+        response.request = request
+        response.encoding = "utf-8"
+        with self._lock:
+            self.bytes += len(response._content)
+        return response
+
+    def _temperature(self, lat, dt):
+        # Warmer toward the equator, with a daily cycle
+        hour = (dt // 3600) % 24
+        return round(95 - abs(lat) * 0.9 + 8 * math.sin((hour - 9) / 24 * 2 * math.pi), 2)
+
+    def _nearest_name(self, lat, lon):
+        nearby = load_place_index().within(lat, lon, 40)
+        return nearby[0][1]["name"] if nearby else f"{lat:.2f},{lon:.2f}"
+
+    def _weather(self, params):
+        if "q" in params:
+            place = self.places.get(params["q"].split(",")[0].strip().lower())
+            if place is None:
+                return 404, {"cod": "404", "message": "city not found"}
+            lat, lon, name = place["lat"], place["lon"], place["name"]
+        else:
+            lat, lon = float(params["lat"]), float(params["lon"])
+            name = self._nearest_name(lat, lon)
+        now = int(time.time())
+        description = DESCRIPTIONS[int(abs(lat * 7 + lon)) % len(DESCRIPTIONS)]
+        temp = self._temperature(lat, now)
+        return 200, {
+            "coord": {"lon": lon, "lat": lat},
+            "weather": [{"id": 800, "main": description.split()[-1].title(), "description": description, "icon": "01d"}],
+            "base": "stations",
+            "main": {"temp": temp, "feels_like": temp, "temp_min": temp - 3, "temp_max": temp + 3,
+                     "pressure": 1015, "humidity": 55},
+            "visibility": 10000,
+            "wind": {"speed": 6.9, "deg": 200},
+            "clouds": {"all": 20},
+            "dt": now,
+            "sys": {"country": "US", "sunrise": now - 30000, "sunset": now + 10000},
+            "timezone": round(lon / 15) * 3600,
+            "id": abs(hash((lat, lon))) % 10000000,
+            "name": name,
+            "cod": 200,
+        }
+
+    def _forecast(self, params):
+        lat, lon = float(params["lat"]), float(params["lon"])
+        start = int(time.time()) // 10800 * 10800 + 10800
+        slots = []
+        for index in range(40):
+            dt = start + index * 10800
+            description = DESCRIPTIONS[(index // 3 + int(abs(lat + lon))) % len(DESCRIPTIONS)]
+            temp = self._temperature(lat, dt)
+            slots.append({
+                "dt": dt,
+                "main": {"temp": temp, "feels_like": temp, "temp_min": temp - 1, "temp_max": temp + 1,
+                         "pressure": 1014, "sea_level": 1014, "grnd_level": 990, "humidity": 40 + index % 30,
+                         "temp_kf": 0},
+                "weather": [{"id": 800, "main": description.split()[-1].title(), "description": description,
+                             "icon": "01d"}],
+                "clouds": {"all": (index * 7) % 100},
+                "wind": {"speed": 3 + index % 9, "deg": (index * 37) % 360, "gust": 5 + index % 11},
+                "visibility": 10000,
+                "pop": round((index % 5) / 5, 2),
+                "sys": {"pod": "d" if 6 <= (dt // 3600) % 24 < 18 else "n"},
+                "dt_txt": time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(dt)),
+            })
+        return 200, {
+            "cod": "200", "message": 0, "cnt": 40, "list": slots,
+            "city": {"id": 1, "name": self._nearest_name(lat, lon), "coord": {"lat": lat, "lon": lon},
+                     "country": "US", "population": 100000, "timezone": round(lon / 15) * 3600,
+                     "sunrise": start, "sunset": start + 40000},
+        }
+
+    def _onecall(self, params):
+        lat, lon = float(params["lat"]), float(params["lon"])
+        now = int(time.time())
+        start = now // 3600 * 3600 + 3600
+
+        def conditions(index):
+            description = DESCRIPTIONS[(index // 6 + int(abs(lat + lon))) % len(DESCRIPTIONS)]
+            return [{"id": 800, "main": description.split()[-1].title(), "description": description, "icon": "01d"}]
+
+        hourly = [
+            {"dt": start + index * 3600, "temp": self._temperature(lat, start + index * 3600),
+             "feels_like": self._temperature(lat, start + index * 3600), "pressure": 1014, "humidity": 40 + index % 30,
+             "dew_point": 50.0, "uvi": 3.2, "clouds": (index * 7) % 100, "visibility": 10000,
+             "wind_speed": 3 + index % 9, "wind_deg": (index * 37) % 360, "wind_gust": 5 + index % 11,
+             "weather": conditions(index), "pop": round((index % 5) / 5, 2)}
+            for index in range(48)
+        ]
+        daily = []
+        for index in range(8):
+            noon = now // 86400 * 86400 + index * 86400 + 43200 - round(lon / 15) * 3600
+            high, low = self._temperature(lat, noon + 10800), self._temperature(lat, noon - 36000)
+            daily.append({
+                "dt": noon, "sunrise": noon - 21600, "sunset": noon + 21600, "moonrise": noon, "moonset": noon,
+                "moon_phase": 0.5, "summary": "Expect a day of partly cloudy weather",
+                "temp": {"day": round((high + low) / 2, 2), "min": low, "max": high, "night": low, "eve": high, "morn": low},
+                "feels_like": {"day": high, "night": low, "eve": high, "morn": low},
+                "pressure": 1015, "humidity": 45 + index, "dew_point": 48.0, "wind_speed": 6 + index,
+                "wind_deg": 200, "wind_gust": 12 + index, "weather": conditions(index * 6), "clouds": 20,
+                "pop": round((index % 4) / 4, 2), "uvi": 6.1,
+            })
+        return 200, {
+            "lat": lat, "lon": lon, "timezone": "UTC", "timezone_offset": round(lon / 15) * 3600,
+            "current": dict(hourly[0], dt=now, sunrise=now - 30000, sunset=now + 10000),
+            "hourly": hourly, "daily": daily,
+        }
+
+    def _stations(self, params):
+        min_lat, min_lon, max_lat, max_lon = (float(value) for value in params["extent"].split(","))
+        lat, lon = (min_lat + max_lat) / 2, (min_lon + max_lon) / 2
+        results = [
+            {"elevation": 300, "mindate": "1948-01-01", "maxdate": "2025-12-31",
+             "latitude": round(lat + offset, 4), "longitude": round(lon - offset, 4),
+             "name": f"STATION {index + 1}, US", "datacoverage": 0.98 - index * 0.05,
+             "id": f"GHCND:USW000{abs(int(lat * 100 + lon * 10)) % 10000:04d}{index}", "elevationUnit": "METERS"}
+            for index, offset in enumerate((0.05, 0.12, 0.2))
+        ]
+        return 200, {"metadata": {"resultset": {"offset": 1, "count": len(results), "limit": 1000}},
+                     "results": results}
+
+    def _data(self, params):
+        year, month = int(params["startdate"][:4]), int(params["startdate"][5:7])
+        last_day = int(params["enddate"][8:10])
+        stations = params["stationid"]
+        rows = []
+        for station in stations:
+            for day in range(1, last_day + 1):
+                base = 60 + 25 * math.sin((month - 4) / 12 * 2 * math.pi)
+                rows.append({"date": f"{year}-{month:02d}-{day:02d}T00:00:00", "datatype": "TMAX",
+                             "station": station, "attributes": ",,W,2400", "value": round(base + 10 + day % 5, 1)})
+                rows.append({"date": f"{year}-{month:02d}-{day:02d}T00:00:00", "datatype": "TMIN",
+                             "station": station, "attributes": ",,W,2400", "value": round(base - 8 - day % 4, 1)})
+        offset = int(params.get("offset", 1))
+        limit = int(params.get("limit", 1000))
+        page = rows[offset - 1:offset - 1 + limit]
+        return 200, {"metadata": {"resultset": {"offset": offset, "count": len(rows), "limit": limit}},
+                     "results": page}
+
+# Function to route every provider client through the fake transport
+def install_fake_transport(transport, unthrottled=False):
+    for name in PROVIDERS:
+        client = provider_client(name)
+        client.session.mount("https://", transport)
+        client.session.mount("http://", transport)
+        if unthrottled:
+            client.bucket.rate = 1e9
+            client.bucket.daily_limit = None
+
+# Point every on-disk store at a scratch directory and start from empty caches
+def isolate_storage(directory):
+    with geocoding._geocode_lock:
+        geocoding.GEOCODE_CACHE_PATH = f"{directory}/geocode_cache.db"
+        geocoding._geocode_conn = None
+        geocoding._geocode_memory.clear()
+        geocoding._geocode_stats.update(hits=0, misses=0)
+    with historical._climatology_lock:
+        historical.CLIMATOLOGY_DB_PATH = f"{directory}/climatology.db"
+        historical._climatology_conn = None
+    response_cache.clear()
+    set_preference_backend(InMemoryPreferenceBackend())
+
+# A chat model that picks tools with simple rules instead of calling Grok
+def make_scripted_llm(latency=0.3):
+    from langchain_core.language_models.chat_models import BaseChatModel
+    from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+    from langchain_core.outputs import ChatGeneration, ChatResult
+
+    city_pattern = re.compile(r"(?:in|for) ([A-Z][\w .,'-]*?)(?: in (\w+))?(?: today| this week)?[?.!]*$")
+
+    class ScriptedChatModel(BaseChatModel):
+        latency: float = 0.3
+        calls: int = 0
+
+        @property
+        def _llm_type(self):
+            return "scripted"
+
+        def bind_tools(self, tools, **kwargs):
+            return self
+
+        def _choose_tool(self, text):
+            match = city_pattern.search(text)
+            city = match.group(1) if match else "Knoxville"
+            lowered = text.lower()
+            if lowered.startswith(("i like", "i prefer")):
+                return "update_user_preferences", text
+            if "preferences" in lowered or "preferred" in lowered:
+                return "get_user_preferences", text
+            if "highs and lows" in lowered and match and match.group(2):
+                return "historical_weather", f"{city} {match.group(2)}"
+            if "warm" in lowered:
+                return "find_warm_places", text
+            if "forecast" in lowered or "week" in lowered:
+                return "forecast_weather", city
+            return "weather_lookup", city
+
+        def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+            time.sleep(self.latency)
+            self.calls += 1
+            last = messages[-1]
+            # The agent's prompt renders the scratchpad as text in a trailing assistant message
+            if isinstance(last, ToolMessage) or (isinstance(last, AIMessage) and "ToolMessage" in last.content):
+                message = AIMessage(content=f"Here's what I found: {str(last.content)[:400]}")
+            else:
+                text = next((m.content for m in reversed(messages) if isinstance(m, HumanMessage)), "")
+                tool, argument = self._choose_tool(text)
+                message = AIMessage(content="", tool_calls=[
+                    {"name": tool, "args": {"__arg1": argument}, "id": f"call_{self.calls}"}
+                ])
+            return ChatResult(generations=[ChatGeneration(message=message)])
+
+    return ScriptedChatModel(latency=latency)
+
+# Wrap the agent's tools so each call's duration is recorded under the tool's name
+def _time_tools(agent):
+    durations = {}
+    lock = threading.Lock()
+
+    def timed(name, func):
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                with lock:
+                    durations.setdefault(name, []).append(time.perf_counter() - started)
+        return wrapper
+
+    for tool in agent.executor.tools:
+        tool.func = timed(tool.name, tool.func)
+    return durations
+
+def _demo_scenario(args, fast_path=True):
+    from .__main__ import DEMO_QUERIES
+    from .agent import create_agent
+
+    agent = create_agent({"llm": make_scripted_llm(args.llm_latency_ms / 1000), "verbose": False,
+                          "fast_path": fast_path})
+    durations = _time_tools(agent)
+    latencies = []
+    for query in DEMO_QUERIES:
+        started = time.perf_counter()
+        agent.invoke({"input": query, "user_id": "bench"})
+        latencies.append(time.perf_counter() - started)
+    return latencies, {name: _latency_summary(values) for name, values in durations.items()}
+
+def _timed(func, inputs):
+    latencies = []
+    for item in inputs:
+        started = time.perf_counter()
+        func(item)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+def _catalog_cities(count):
+    places = load_place_index().places
+    return [place["label"] for place in places[::max(1, len(places) // count)][:count]]
+
+SCENARIOS = {
+    "demo_queries": _demo_scenario,
+    "demo_queries_agent": lambda args: _demo_scenario(args, fast_path=False),
+    "current_weather_20_cities": lambda args: (_timed(lambda batch: fetch_many(get_current_weather, batch),
+                                                      [_catalog_cities(20)]), {}),
+    "current_and_forecast_10_cities": lambda args: (_timed(
+        lambda city: (get_current_weather(city), get_weather_forecast(city)), _catalog_cities(10)), {}),
+    "forecast_20_cities": lambda args: (_timed(lambda batch: fetch_many(get_weather_forecast, batch),
+                                               [_catalog_cities(20)]), {}),
+    "warm_places_radius": lambda args: (_timed(find_warm_places, [
+        "warm places within 300 miles of Tucson", "warm places within 300 miles of Miami",
+        "warm places near Austin"]), {}),
+    "route_knoxville_to_los_angeles": lambda args: (_timed(get_route_weather, [
+        "Knoxville -> Memphis -> Amarillo -> Albuquerque -> Phoenix -> Los Angeles"]), {}),
+}
+
+def run_scenario(name, args, transport):
+    report = {"name": name}
+    for phase in ("cold", "warm"):
+        if phase == "cold":
+            isolate_storage(tempfile.mkdtemp(prefix="nomadicsky-bench-"))
+        transport.reset_counts()
+        before_cache = response_cache.stats()
+        before_geocode = geocode_stats()
+        before_providers = get_provider_stats()
+        started = time.perf_counter()
+        latencies, tool_latency = SCENARIOS[name](args)
+        wall = time.perf_counter() - started
+        after_cache = response_cache.stats()
+        after_geocode = geocode_stats()
+        retries = sum(stats["retries"] - before_providers.get(provider, {}).get("retries", 0)
+                      for provider, stats in get_provider_stats().items())
+
+        def delta(after, before):
+            hits, misses = after["hits"] - before["hits"], after["misses"] - before["misses"]
+            return {"hits": hits, "misses": misses, "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0}
+
+        report[phase] = {
+            "operations": len(latencies),
+            "wall_seconds": round(wall, 3),
+            "throughput_per_second": round(len(latencies) / wall, 3) if wall else 0.0,
+            "latency_ms": _latency_summary(latencies),
+            "tool_latency_ms": tool_latency,
+            "requests": dict(sorted(transport.counts.items()), total=sum(transport.counts.values()),
+                             retries=retries, bytes=transport.bytes),
+            "cache": {"response": delta(after_cache, before_cache), "geocode": delta(after_geocode, before_geocode)},
+        }
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="nomadicsky.bench", description="Offline NomadicSky benchmarks.")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated scenario names")
+    parser.add_argument("--latency-ms", type=float, default=80, help="simulated provider latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of provider requests failing with 429/503")
+    parser.add_argument("--llm-latency-ms", type=float, default=400, help="simulated latency per LLM call")
+    parser.add_argument("--unthrottled", action="store_true", help="disable the providers' rate limits")
+    parser.add_argument("--provider", choices=("onecall", "classic"), default=providers.WEATHER_PROVIDER,
+                        help="weather data source to benchmark")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    # Placeholder keys: nothing leaves the process
+    for key in ("OPENWEATHERMAP_API_KEY", "NOAA_API_KEY", "GROK3_API_KEY"):
+        os.environ.setdefault(key, "offline-benchmark")
+    providers.WEATHER_PROVIDER = args.provider
+    transport = FakeProviderTransport(args.latency_ms / 1000, error_rate=args.error_rate, seed=args.seed)
+    install_fake_transport(transport, unthrottled=args.unthrottled)
+
+    report = {
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        "scenarios": [run_scenario(name, args, transport) for name in args.scenarios.split(",") if name],
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+
+from .config import load_api_key
+from .http_client import provider_client
+from .records import decode_cache_value, encode_cache_value, loads
+from .telemetry import record_cache_lookup
+
+# In-process LRU cache for weather API responses, keyed by endpoint + coordinates + units.
+# TTLs follow how often OpenWeatherMap refreshes the data: current conditions roughly
+# every 10 minutes, forecast slots every 3 hours. Set NOMADICSKY_RESPONSE_CACHE_DB to
+# also keep entries on disk across restarts, or NOMADICSKY_DISABLE_CACHE=1 to bypass it.
+# Weather entries are compact records (see records.py) rather than response bodies; on disk
+# they are stored in their encoded form, in a table separate from the older raw-JSON one.
+CURRENT_WEATHER_TTL = int(os.environ.get("NOMADICSKY_CURRENT_TTL", 10 * 60))
+FORECAST_TTL = int(os.environ.get("NOMADICSKY_FORECAST_TTL", 3 * 3600))
+RESPONSE_CACHE_SIZE = int(os.environ.get("NOMADICSKY_RESPONSE_CACHE_SIZE", 1024))
+RESPONSE_CACHE_PATH = os.environ.get("NOMADICSKY_RESPONSE_CACHE_DB")
+RESPONSE_CACHE_DISABLED = os.environ.get("NOMADICSKY_DISABLE_CACHE", "") not in ("", "0", "false")
+
+class ResponseCache:
+    def __init__(self, max_entries, path=None):
+        self.max_entries = max_entries
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._conn = None
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS records (key TEXT PRIMARY KEY, body TEXT, expires_at REAL)"
+            )
+            self._conn.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT body, expires_at FROM records WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    entry = (row[1], decode_cache_value(row[0]))
+                    self._remember(key, entry)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                self._entries.pop(key, None)
+            self.misses += 1
+            return None
+
+    def set(self, key, value, ttl):
+        entry = (time.time() + ttl, value)
+        with self._lock:
+            self._remember(key, entry)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO records (key, body, expires_at) VALUES (?, ?, ?)",
+                    (key, encode_cache_value(value), entry[0])
+                )
+                self._conn.commit()
+
+    # Seconds until the entry for key expires; 0 if it is missing or stale
+    def ttl_remaining(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+        return max(entry[0] - time.time(), 0) if entry is not None else 0
+
+    def _remember(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM records")
+                self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "size": len(self._entries),
+            }
+
+response_cache = ResponseCache(RESPONSE_CACHE_SIZE, RESPONSE_CACHE_PATH)
+
+def owm_cache_key(endpoint, lat, lon, units="imperial"):
+    return f"{endpoint}:{round(lat, 4)}:{round(lon, 4)}:{units}"
+
+# Function to fetch an OpenWeatherMap endpoint for a coordinate pair, through the response cache.
+# Returns (status_code, data); only successful responses are cached. refresh=True skips the
+# cached copy but stores the new response (used by the pre-warmer). parse, if given, turns the
+# decoded body into what is cached and returned, so only the fields it keeps stay in memory.
+def fetch_owm_json(endpoint, lat, lon, ttl, units="imperial", use_cache=True, refresh=False, parse=None):
+    use_cache = use_cache and not RESPONSE_CACHE_DISABLED
+    key = owm_cache_key(endpoint, lat, lon, units)
+    if use_cache and not refresh:
+        data = response_cache.get(key)
+        record_cache_lookup("response", data is not None)
+        if data is not None:
+            return 200, data
+    try:
+        response = provider_client("openweathermap").get(
+            f"/data/2.5/{endpoint}",
+            params={"lat": lat, "lon": lon, "appid": load_api_key("OPENWEATHERMAP_API_KEY"), "units": units}
+        )
+    except requests.RequestException as exc:
+        return f"network error ({type(exc).__name__})", None
+    if response.status_code != 200:
+        return response.status_code, None
+    data = loads(response.content)
+    if parse is not None:
+        data = parse(data)
+    if use_cache:
+        response_cache.set(key, data, ttl)
+    return 200, data
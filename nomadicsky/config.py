@@ -0,0 +1,33 @@
+import os
+import threading
+
+# API keys come from environment variables first, then from api_keys.txt. The file is read
+# once, the first time a key is needed, so importing the package never touches it.
+API_KEYS_PATH = os.environ.get("NOMADICSKY_API_KEYS_FILE", "api_keys.txt")
+
+_api_keys = None
+_api_keys_lock = threading.Lock()
+
+def _read_api_keys_file():
+    keys = {}
+    try:
+        with open(API_KEYS_PATH, "r") as file:
+            for line in file:
+                if "=" in line:
+                    name, value = line.split("=", 1)
+                    keys[name.strip()] = value.strip()
+    except FileNotFoundError:
+        pass
+    return keys
+
+# Load an API key from the environment or api_keys.txt
+def load_api_key(key_name):
+    global _api_keys
+    if os.environ.get(key_name):
+        return os.environ[key_name]
+    with _api_keys_lock:
+        if _api_keys is None:
+            _api_keys = _read_api_keys_file()
+    if key_name in _api_keys:
+        return _api_keys[key_name]
+    raise ValueError(f"{key_name} not found in the environment or {API_KEYS_PATH}")
@@ -0,0 +1,63 @@
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Bounded-concurrency fan-out for multi-city tools. fetch_many() runs one call per item
+# on a thread pool and returns results in input order; each provider client caps how many
+# requests are in flight against it, however many fan-outs are running.
+FANOUT_MAX_WORKERS = int(os.environ.get("NOMADICSKY_FANOUT_WORKERS", 16))
+# Async tools run their sync implementation on one dedicated pool rather than the event
+# loop's default executor (min(32, CPUs + 4) threads, shared with LangChain and anything else
+# using to_thread). At most ASYNC_TOOL_WORKERS tool calls run at once; later ones wait for a
+# free thread. A tool that fans out uses up to FANOUT_MAX_WORKERS more threads while it runs.
+ASYNC_TOOL_WORKERS = int(os.environ.get("NOMADICSKY_ASYNC_TOOL_WORKERS", 64))
+_tool_executor = None
+_tool_executor_lock = threading.Lock()
+
+# Function to call func(item) for every item concurrently. A failing item yields an
+# {"error": ...} result instead of stopping the batch.
+def fetch_many(func, items, max_workers=None):
+    items = list(items)
+    if len(items) == 1 or max_workers == 1:
+        return [_run_fetch(func, item) for item in items]
+    results = [None] * len(items)
+    for index, result in iter_fetch_many(func, items, max_workers):
+        results[index] = result
+    return results
+
+def _run_fetch(func, item):
+    try:
+        return func(item)
+    except Exception as exc:
+        return {"error": f"Error fetching {item}: {exc}"}
+
+# Function to call func(item) for every item concurrently, yielding (index, result) as each finishes.
+# Each call runs in a copy of the caller's context, so context variables such as the current
+# user carry over into the worker threads.
+def iter_fetch_many(func, items, max_workers=None):
+    items = list(items)
+    if not items:
+        return
+    with ThreadPoolExecutor(max_workers=min(len(items), max_workers or FANOUT_MAX_WORKERS)) as pool:
+        futures = {
+            pool.submit(contextvars.copy_context().run, _run_fetch, func, item): index
+            for index, item in enumerate(items)
+        }
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+def tool_executor():
+    global _tool_executor
+    with _tool_executor_lock:
+        if _tool_executor is None:
+            _tool_executor = ThreadPoolExecutor(max_workers=ASYNC_TOOL_WORKERS, thread_name_prefix="nomadicsky-tool")
+        return _tool_executor
+
+# Function to run a sync tool function on the tool pool and await its result. Like
+# asyncio.to_thread, it carries the current context (e.g. the current user) into the thread.
+async def run_tool_async(func, *args):
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(tool_executor(), functools.partial(context.run, func, *args))
@@ -0,0 +1,126 @@
+import math
+import os
+import sqlite3
+import threading
+import time
+
+import requests
+
+from .cache import CURRENT_WEATHER_TTL, RESPONSE_CACHE_DISABLED, owm_cache_key, response_cache
+from .config import load_api_key
+from .http_client import provider_client
+from .providers import parse_current_payload
+from .records import loads
+from .telemetry import record_cache_lookup
+
+# Persistent geocoding cache: normalized city name -> (lat, lon, canonical name)
+# City coordinates never change, so every tool resolves names through here instead of
+# calling the OpenWeatherMap /weather endpoint just to get lat/lon. Invalid names
+# (404 from OpenWeatherMap) are cached too, for a shorter time.
+GEOCODE_CACHE_PATH = os.environ.get("NOMADICSKY_GEOCODE_DB", "geocode_cache.db")
+GEOCODE_TTL = int(os.environ.get("NOMADICSKY_GEOCODE_TTL", 30 * 24 * 3600))  # 30 days
+GEOCODE_NEGATIVE_TTL = int(os.environ.get("NOMADICSKY_GEOCODE_NEGATIVE_TTL", 24 * 3600))  # 1 day
+WEATHER_CELL_DEGREES = 0.25
+
+_geocode_lock = threading.Lock()
+_geocode_conn = None
+_geocode_memory = {}
+_geocode_stats = {"hits": 0, "misses": 0}
+
+def normalize_city_key(location):
+    # "  knoxville ,  TN,US " -> "knoxville,tn,us"
+    parts = [" ".join(part.split()) for part in location.lower().split(",")]
+    return ",".join(part for part in parts if part)
+
+def _geocode_db():
+    global _geocode_conn
+    if _geocode_conn is None:
+        _geocode_conn = sqlite3.connect(GEOCODE_CACHE_PATH, check_same_thread=False)
+        _geocode_conn.execute(
+            "CREATE TABLE IF NOT EXISTS geocode ("
+            "key TEXT PRIMARY KEY, lat REAL, lon REAL, name TEXT, status INTEGER, fetched_at REAL)"
+        )
+        _geocode_conn.commit()
+    return _geocode_conn
+
+def _geocode_entry_is_fresh(entry, now):
+    ttl = GEOCODE_TTL if entry["status"] == 200 else GEOCODE_NEGATIVE_TTL
+    return now - entry["fetched_at"] < ttl
+
+def _geocode_result(entry):
+    if entry["status"] == 200:
+        return {"lat": entry["lat"], "lon": entry["lon"], "city": entry["name"]}
+    return {"error": f"Could not find coordinates for {entry['name']}: {entry['status']}", "status": entry["status"]}
+
+def _store_geocode_entry(key, entry):
+    with _geocode_lock:
+        _geocode_memory[key] = entry
+        db = _geocode_db()
+        db.execute(
+            "INSERT OR REPLACE INTO geocode (key, lat, lon, name, status, fetched_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (key, entry["lat"], entry["lon"], entry["name"], entry["status"], entry["fetched_at"])
+        )
+        db.commit()
+
+# Function to resolve a city name to coordinates, using the geocoding cache
+def geocode_city(location):
+    key = normalize_city_key(location)
+    if not key:
+        return {"error": "Please provide a city name.", "status": 400}
+    now = time.time()
+
+    with _geocode_lock:
+        entry = _geocode_memory.get(key)
+        if entry is None:
+            row = _geocode_db().execute(
+                "SELECT lat, lon, name, status, fetched_at FROM geocode WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                entry = {"lat": row[0], "lon": row[1], "name": row[2], "status": row[3], "fetched_at": row[4]}
+                _geocode_memory[key] = entry
+        fresh = entry is not None and _geocode_entry_is_fresh(entry, now)
+        _geocode_stats["hits" if fresh else "misses"] += 1
+    record_cache_lookup("geocode", fresh)
+    if fresh:
+        return _geocode_result(entry)
+
+    try:
+        response = provider_client("openweathermap").get(
+            "/data/2.5/weather",
+            params={"q": location, "appid": load_api_key("OPENWEATHERMAP_API_KEY"), "units": "imperial"}
+        )
+    except requests.RequestException as exc:
+        return {"error": f"Could not find coordinates for {location}: {exc}", "status": "network error"}
+    if response.status_code == 200:
+        data = loads(response.content)
+        entry = {"lat": data["coord"]["lat"], "lon": data["coord"]["lon"], "name": data["name"],
+                 "status": 200, "fetched_at": now}
+        # The lookup is a full current-weather response too, so a current-weather request
+        # for the same coordinates right after geocoding needs no second call
+        if not RESPONSE_CACHE_DISABLED:
+            response_cache.set(owm_cache_key("weather", entry["lat"], entry["lon"]), parse_current_payload(data),
+                               CURRENT_WEATHER_TTL)
+    elif response.status_code == 404:
+        # Negative cache: remember that this name doesn't resolve
+        entry = {"lat": None, "lon": None, "name": location.strip(), "status": 404, "fetched_at": now}
+    else:
+        # Auth errors, rate limits and outages are not facts about the city, so don't cache them
+        return {"error": f"Could not find coordinates for {location}: {response.status_code}", "status": response.status_code}
+    _store_geocode_entry(key, entry)
+    return _geocode_result(entry)
+
+def geocode_stats():
+    with _geocode_lock:
+        lookups = _geocode_stats["hits"] + _geocode_stats["misses"]
+        return dict(_geocode_stats, hit_rate=round(_geocode_stats["hits"] / lookups, 3) if lookups else 0.0)
+
+# Great-circle distance in miles
+def distance_miles(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 3958.8 * 2 * math.asin(math.sqrt(a))
+
+# Snap a point to the center of its weather grid cell, so nearby lookups share a cache key
+def weather_cell(lat, lon, cell_degrees=WEATHER_CELL_DEGREES):
+    return (round(round(lat / cell_degrees) * cell_degrees, 4),
+            round(round(lon / cell_degrees) * cell_degrees, 4))
@@ -0,0 +1,229 @@
+import calendar
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import requests
+
+from .config import load_api_key
+from .fanout import fetch_many, run_tool_async
+from .geocoding import distance_miles, geocode_city
+from .http_client import provider_client
+from .memo import memoized_tool
+from .telemetry import traced_tool
+
+# Historical weather from NOAA CDO. Monthly highs and lows come from the GHCND stations
+# nearest the location, paged through in full and averaged over several complete years.
+# Daily rows are kept in a local SQLite climatology store, so a month that has been fetched
+# once for a station is answered from disk afterwards.
+CLIMATOLOGY_DB_PATH = os.environ.get("NOMADICSKY_CLIMATOLOGY_DB", "climatology.db")
+HISTORICAL_YEARS = int(os.environ.get("NOMADICSKY_HISTORICAL_YEARS", 3))
+HISTORICAL_STATIONS = int(os.environ.get("NOMADICSKY_HISTORICAL_STATIONS", 3))
+STATION_SEARCH_RADII = (0.25, 0.75, 2.0)  # degrees of lat/lon around the location
+STATION_LOOKUP_TTL = 30 * 24 * 3600
+# NOAA keeps adding and correcting daily rows for a while after a month ends
+COVERAGE_SETTLE_DAYS = int(os.environ.get("NOMADICSKY_COVERAGE_SETTLE_DAYS", 14))
+NOAA_PAGE_SIZE = 1000
+
+MONTHS = {
+    "january": 1, "february": 2, "march": 3, "april": 4,
+    "may": 5, "june": 6, "july": 7, "august": 8,
+    "september": 9, "october": 10, "november": 11, "december": 12
+}
+
+_climatology_lock = threading.Lock()
+_climatology_conn = None
+
+def _climatology_db():
+    global _climatology_conn
+    if _climatology_conn is None:
+        _climatology_conn = sqlite3.connect(CLIMATOLOGY_DB_PATH, check_same_thread=False)
+        _climatology_conn.executescript(
+            "CREATE TABLE IF NOT EXISTS daily ("
+            " station TEXT, date TEXT, datatype TEXT, value REAL,"
+            " PRIMARY KEY (station, date, datatype));"
+            "CREATE TABLE IF NOT EXISTS coverage ("
+            " station TEXT, year INTEGER, month INTEGER, fetched_at REAL,"
+            " PRIMARY KEY (station, year, month));"
+            "CREATE TABLE IF NOT EXISTS station_lookup (key TEXT PRIMARY KEY, stations TEXT, fetched_at REAL);"
+        )
+    return _climatology_conn
+
+# Function to GET every page of a NOAA CDO endpoint (results are capped at 1000 per request)
+def noaa_get_all(path, params):
+    headers = {"token": load_api_key("NOAA_API_KEY")}
+    results = []
+    offset = 1
+    while True:
+        response = provider_client("noaa").get(
+            path, params=dict(params, limit=NOAA_PAGE_SIZE, offset=offset), headers=headers
+        )
+        if response.status_code != 200:
+            return response.status_code, None
+        data = response.json()
+        page = data.get("results", [])
+        results.extend(page)
+        total = data.get("metadata", {}).get("resultset", {}).get("count", 0)
+        offset += len(page)
+        if not page or offset > total:
+            return 200, results
+
+# Function to find the GHCND stations nearest to a point that cover the requested years
+def find_nearest_stations(lat, lon, first_year, last_year):
+    key = f"{round(lat, 2)}:{round(lon, 2)}"
+    with _climatology_lock:
+        row = _climatology_db().execute(
+            "SELECT stations, fetched_at FROM station_lookup WHERE key = ?", (key,)
+        ).fetchone()
+    if row is not None and time.time() - row[1] < STATION_LOOKUP_TTL:
+        stations = json.loads(row[0])
+    else:
+        stations = []
+        for radius in STATION_SEARCH_RADII:
+            extent = f"{lat - radius},{lon - radius},{lat + radius},{lon + radius}"
+            status, results = noaa_get_all(
+                "/stations", {"datasetid": "GHCND", "datatypeid": "TMAX", "extent": extent}
+            )
+            if status != 200:
+                return status, None
+            stations = [
+                {"id": station["id"], "name": station["name"],
+                 "distance": round(distance_miles(lat, lon, station["latitude"], station["longitude"]), 1),
+                 "mindate": station["mindate"], "maxdate": station["maxdate"]}
+                for station in results
+            ]
+            if stations:
+                break
+        stations.sort(key=lambda station: station["distance"])
+        with _climatology_lock:
+            _climatology_db().execute(
+                "INSERT OR REPLACE INTO station_lookup (key, stations, fetched_at) VALUES (?, ?, ?)",
+                (key, json.dumps(stations), time.time())
+            )
+            _climatology_db().commit()
+    covering = [
+        station for station in stations
+        if station["mindate"][:4] <= str(first_year) and station["maxdate"][:4] >= str(last_year)
+    ]
+    return 200, (covering or stations)[:HISTORICAL_STATIONS]
+
+# Function to tell whether a month's NOAA data is final: it ended COVERAGE_SETTLE_DAYS or more ago
+def month_settled(year, month, now=None):
+    last_day = calendar.monthrange(year, month)[1]
+    settled_at = calendar.timegm((year, month, last_day, 0, 0, 0)) + (1 + COVERAGE_SETTLE_DAYS) * 86400
+    return (time.time() if now is None else now) >= settled_at
+
+# Function to make sure the climatology store holds one station-month-year of daily TMAX/TMIN rows.
+# Months that aren't settled yet are fetched every time and never marked as covered.
+def ensure_station_month(station_ids, year, month):
+    with _climatology_lock:
+        placeholders = ",".join("?" * len(station_ids))
+        have = {row[0] for row in _climatology_db().execute(
+            f"SELECT station FROM coverage WHERE year = ? AND month = ? AND station IN ({placeholders})",
+            (year, month, *station_ids)
+        )}
+    missing = [station_id for station_id in station_ids if station_id not in have]
+    if not missing:
+        return 200
+    last_day = calendar.monthrange(year, month)[1]
+    status, results = noaa_get_all("/data", {
+        "datasetid": "GHCND", "datatypeid": "TMAX,TMIN", "stationid": missing, "units": "standard",
+        "startdate": f"{year}-{month:02d}-01", "enddate": f"{year}-{month:02d}-{last_day}",
+    })
+    if status != 200:
+        return status
+    now = time.time()
+    with _climatology_lock:
+        db = _climatology_db()
+        db.executemany(
+            "INSERT OR REPLACE INTO daily (station, date, datatype, value) VALUES (?, ?, ?, ?)",
+            [(entry["station"], entry["date"][:10], entry["datatype"], entry["value"]) for entry in results]
+        )
+        if month_settled(year, month, now):
+            db.executemany(
+                "INSERT OR REPLACE INTO coverage (station, year, month, fetched_at) VALUES (?, ?, ?, ?)",
+                [(station_id, year, month, now) for station_id in missing]
+            )
+        db.commit()
+    return 200
+
+# Function to fetch historical weather highs and lows from NOAA API
+@traced_tool
+@memoized_tool
+def get_historical_weather(location_month):
+    # Parse input (e.g., "Knoxville June", "New York July", or "Tucson December 2023")
+    parts = location_month.split()
+    years = None
+    if len(parts) >= 3 and parts[-1].isdigit() and len(parts[-1]) == 4:
+        years = [int(parts.pop())]
+    if len(parts) < 2:
+        return {"error": "Please provide a location and month (e.g., 'Knoxville June')."}
+    location, month = " ".join(parts[:-1]), parts[-1]
+
+    month = month.lower()
+    if month not in MONTHS:
+        return {"error": f"Invalid month: {month}. Use full month name (e.g., 'June')."}
+    month_num = MONTHS[month]
+    this_year = time.gmtime().tm_year
+    if years is not None and (years[0], month_num) > (this_year, time.gmtime().tm_mon):
+        return {"error": f"{month.capitalize()} {years[0]} hasn't happened yet. Try a past year."}
+
+    # Default to the most recent complete years
+    if years is None:
+        last_year = this_year - 1
+        years = list(range(last_year - HISTORICAL_YEARS + 1, last_year + 1))
+    year_label = str(years[0]) if len(years) == 1 else f"{years[0]}-{years[-1]}"
+
+    # First, get location coordinates (NOAA API uses lat/lon)
+    geo = geocode_city(location)
+    if "error" in geo:
+        return {"error": f"Could not find coordinates for {location}: {geo['status']}"}
+    city = geo["city"]
+
+    try:
+        status, stations = find_nearest_stations(geo["lat"], geo["lon"], years[0], years[-1])
+        if status != 200:
+            return {"error": f"Error finding weather stations near {city}: {status}"}
+        if not stations:
+            return {"error": f"No NOAA weather stations found near {city}."}
+        station_ids = [station["id"] for station in stations]
+        statuses = fetch_many(lambda year: ensure_station_month(station_ids, year, month_num), years)
+    except requests.RequestException as exc:
+        return {"error": f"Error fetching historical weather for {city}: {exc}"}
+    failed = [status for status in statuses if status != 200]
+    if failed:
+        detail = failed[0]["error"] if isinstance(failed[0], dict) else failed[0]
+        return {"error": f"Error fetching historical weather for {city}: {detail}"}
+
+    # Average from the nearest station that has both highs and lows for the period
+    date_filters = " OR ".join("date LIKE ?" for _ in years)
+    date_args = [f"{year}-{month_num:02d}-%" for year in years]
+    with _climatology_lock:
+        for station in stations:
+            row = _climatology_db().execute(
+                "SELECT AVG(CASE WHEN datatype = 'TMAX' THEN value END),"
+                " AVG(CASE WHEN datatype = 'TMIN' THEN value END),"
+                " COUNT(DISTINCT date)"
+                f" FROM daily WHERE station = ? AND ({date_filters})",
+                (station["id"], *date_args)
+            ).fetchone()
+            if row[0] is not None and row[1] is not None:
+                break
+        else:
+            return {"error": f"No high/low temperature data found for {city} in {month.capitalize()} {year_label}."}
+
+    return {
+        "city": city,
+        "month": month.capitalize(),
+        "years": year_label,
+        "station": station["name"],
+        "station_distance_miles": station["distance"],
+        "days": row[2],
+        "avg_high": round(row[0], 2),
+        "avg_low": round(row[1], 2)
+    }
+
+async def aget_historical_weather(location_month):
+    return await run_tool_async(get_historical_weather, location_month)
@@ -0,0 +1,167 @@
+import os
+import random
+import threading
+import time
+import urllib.parse
+
+import requests
+import requests.adapters
+
+from .telemetry import span
+
+# Provider client layer: one pooled keep-alive session per provider with connect/read
+# timeouts, retries with exponential backoff and jitter on 429/5xx and network errors,
+# a concurrency cap and a token-bucket rate limit (plus an optional daily quota).
+# Every setting can be overridden with NOMADICSKY_* environment variables, and
+# get_provider_stats() reports request, retry, error and throttling counts. Each attempt is
+# also recorded as an "http" telemetry span (host, status, bytes, duration).
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("NOMADICSKY_HTTP_CONNECT_TIMEOUT", 3.05))
+HTTP_READ_TIMEOUT = float(os.environ.get("NOMADICSKY_HTTP_READ_TIMEOUT", 15))
+HTTP_MAX_RETRIES = int(os.environ.get("NOMADICSKY_HTTP_MAX_RETRIES", 3))
+HTTP_BACKOFF_BASE = float(os.environ.get("NOMADICSKY_HTTP_BACKOFF_BASE", 0.5))
+HTTP_BACKOFF_MAX = float(os.environ.get("NOMADICSKY_HTTP_BACKOFF_MAX", 10))
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+PROVIDERS = {
+    # Geocoding and the classic /weather and /forecast endpoints (no daily cap unless set)
+    "openweathermap": {
+        "base_url": "https://api.openweathermap.org",
+        "concurrency": int(os.environ.get("NOMADICSKY_OWM_CONCURRENCY", 8)),
+        "rate": float(os.environ.get("NOMADICSKY_OWM_RATE", 10)),  # requests per second
+        "burst": int(os.environ.get("NOMADICSKY_OWM_BURST", 20)),
+        "daily_limit": int(os.environ.get("NOMADICSKY_OWM_DAILY_LIMIT", 0)) or None,
+    },
+    # One Call 3.0 is billed on its own: the free allowance is 1,000 calls a day. The count is
+    # kept per process, so split the limit between processes sharing a key; raise it for paid plans.
+    "onecall": {
+        "base_url": "https://api.openweathermap.org",
+        "concurrency": int(os.environ.get("NOMADICSKY_ONECALL_CONCURRENCY", 8)),
+        "rate": float(os.environ.get("NOMADICSKY_ONECALL_RATE", 10)),
+        "burst": int(os.environ.get("NOMADICSKY_ONECALL_BURST", 20)),
+        "daily_limit": int(os.environ.get("NOMADICSKY_ONECALL_DAILY_LIMIT", 1000)) or None,
+    },
+    # NOAA CDO allows 5 requests per second and 10,000 per day per token
+    "noaa": {
+        "base_url": "https://www.ncdc.noaa.gov/cdo-web/api/v2",
+        "concurrency": int(os.environ.get("NOMADICSKY_NOAA_CONCURRENCY", 5)),
+        "rate": float(os.environ.get("NOMADICSKY_NOAA_RATE", 5)),
+        "burst": int(os.environ.get("NOMADICSKY_NOAA_BURST", 5)),
+        "daily_limit": int(os.environ.get("NOMADICSKY_NOAA_DAILY_LIMIT", 10000)) or None,
+    },
+    "nws": {
+        "base_url": "https://api.weather.gov",
+        "concurrency": int(os.environ.get("NOMADICSKY_NWS_CONCURRENCY", 4)),
+        "rate": float(os.environ.get("NOMADICSKY_NWS_RATE", 5)),
+        "burst": int(os.environ.get("NOMADICSKY_NWS_BURST", 5)),
+        "daily_limit": int(os.environ.get("NOMADICSKY_NWS_DAILY_LIMIT", 0)) or None,
+    },
+}
+
+class ProviderQuotaExceeded(requests.RequestException):
+    pass
+
+class TokenBucket:
+    def __init__(self, rate, capacity, daily_limit=None):
+        self.rate = rate
+        self.capacity = capacity
+        self.daily_limit = daily_limit
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.day = time.strftime("%Y-%m-%d", time.gmtime())
+        self.used_today = 0
+        self.waited = 0.0
+        self._lock = threading.Lock()
+
+    # Block until a request may be sent; raises ProviderQuotaExceeded when the daily quota is used up
+    def acquire(self):
+        while True:
+            with self._lock:
+                today = time.strftime("%Y-%m-%d", time.gmtime())
+                if today != self.day:
+                    self.day = today
+                    self.used_today = 0
+                if self.daily_limit and self.used_today >= self.daily_limit:
+                    raise ProviderQuotaExceeded(f"daily limit of {self.daily_limit} requests reached")
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    self.used_today += 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+                self.waited += wait
+            time.sleep(wait)
+
+class ProviderClient:
+    def __init__(self, name, base_url, concurrency, rate, burst, daily_limit=None):
+        self.name = name
+        self.base_url = base_url
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.bucket = TokenBucket(rate, burst, daily_limit)
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._stats_lock = threading.Lock()
+        self.stats = {"requests": 0, "ok": 0, "retries": 0, "errors": 0, "status": {}}
+
+    def _count(self, field, status=None):
+        with self._stats_lock:
+            self.stats[field] += 1
+            if status is not None:
+                self.stats["status"][status] = self.stats["status"].get(status, 0) + 1
+
+    def _backoff(self, attempt, response=None):
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), HTTP_BACKOFF_MAX)
+        # Exponential backoff with full jitter
+        return random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * 2 ** attempt))
+
+    # GET a path (relative to the provider's base URL) or a full URL, retrying transient failures
+    def get(self, path, params=None, headers=None):
+        url = path if path.startswith("http") else self.base_url + path
+        with self._slots:
+            for attempt in range(HTTP_MAX_RETRIES + 1):
+                self.bucket.acquire()
+                self._count("requests")
+                try:
+                    with span("http", self.name, host=urllib.parse.urlsplit(url).hostname, attempt=attempt) as record:
+                        response = self.session.get(url, params=params, headers=headers,
+                                                    timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT))
+                        record.set(status=response.status_code, bytes=len(response.content))
+                except (requests.ConnectionError, requests.Timeout):
+                    self._count("errors")
+                    if attempt == HTTP_MAX_RETRIES:
+                        raise
+                    self._count("retries")
+                    time.sleep(self._backoff(attempt))
+                    continue
+                self._count("errors" if response.status_code in RETRY_STATUSES else "ok", response.status_code)
+                if response.status_code in RETRY_STATUSES and attempt < HTTP_MAX_RETRIES:
+                    self._count("retries")
+                    time.sleep(self._backoff(attempt, response))
+                    continue
+                return response
+
+    def get_stats(self):
+        with self._stats_lock:
+            stats = dict(self.stats, status=dict(self.stats["status"]))
+        stats["used_today"] = self.bucket.used_today
+        stats["throttled_seconds"] = round(self.bucket.waited, 3)
+        return stats
+
+_provider_clients = {}
+_provider_clients_lock = threading.Lock()
+
+def provider_client(name):
+    with _provider_clients_lock:
+        if name not in _provider_clients:
+            _provider_clients[name] = ProviderClient(name, **PROVIDERS[name])
+        return _provider_clients[name]
+
+def get_provider_stats():
+    with _provider_clients_lock:
+        clients = dict(_provider_clients)
+    return {name: client.get_stats() for name, client in clients.items()}
@@ -0,0 +1,91 @@
+import contextlib
+import contextvars
+import copy
+import functools
+import re
+import threading
+from concurrent.futures import Future
+
+from .records import dumps
+from .telemetry import record_cache_lookup
+
+# Per-run tool memoization. Each agent run (one invoke/stream of a user query) opens a memo
+# scope, and inside it a memoized tool called again with the same normalized input returns
+# the first call's result instead of fetching again, e.g. forecast_weather for a city that
+# get_user_preferences already fetched a forecast for. Concurrent identical calls wait for
+# the one in flight. The scope lives in a ContextVar, so it follows the run into worker
+# threads but is never shared between runs or users, and results never outlive the run.
+current_memo = contextvars.ContextVar("nomadicsky_tool_memo", default=None)
+
+class ToolMemo:
+    def __init__(self):
+        self.results = {}  # key -> Future
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def call(self, key, func, *args, **kwargs):
+        with self._lock:
+            future = self.results.get(key)
+            owner = future is None
+            if owner:
+                future = self.results[key] = Future()
+                self.misses += 1
+            else:
+                self.hits += 1
+        record_cache_lookup("tool_memo", not owner)
+        if not owner:
+            # Callers may modify what they get back, so each one gets its own copy
+            return copy.deepcopy(future.result())
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as exc:
+            # Don't remember failures that raised; the next caller tries again
+            with self._lock:
+                self.results.pop(key, None)
+            future.set_exception(exc)
+            raise
+        future.set_result(result)
+        return copy.deepcopy(result)
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self.results)}
+
+@contextlib.contextmanager
+def memo_scope():
+    # A nested run (e.g. a sub-query) shares the enclosing run's memo
+    if current_memo.get() is not None:
+        yield current_memo.get()
+        return
+    memo = ToolMemo()
+    token = current_memo.set(memo)
+    try:
+        yield memo
+    finally:
+        current_memo.reset(token)
+
+# "  Knoxville , TN?" -> "knoxville,tn"
+def normalize_tool_input(value):
+    if isinstance(value, str):
+        return re.sub(r"\s*,\s*", ",", " ".join(value.split())).strip(" ?.!").lower()
+    return value
+
+# Decorator memoizing a read-only tool function within the current memo scope; outside a
+# scope it calls straight through
+def memoized_tool(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        memo = current_memo.get()
+        if memo is None:
+            return func(*args, **kwargs)
+        key = (func.__name__, tuple(normalize_tool_input(arg) for arg in args),
+               tuple(sorted((name, normalize_tool_input(value)) for name, value in kwargs.items())))
+        return memo.call(key, func, *args, **kwargs)
+    return wrapper
+
+# Tool results as the agent sees them: dicts and lists as compact JSON, text unchanged
+def compact_tool_output(result):
+    if isinstance(result, (dict, list)):
+        return dumps(result)
+    return result
@@ -0,0 +1,254 @@
+import csv
+import math
+import os
+import re
+import threading
+
+from .fanout import fetch_many, iter_fetch_many, run_tool_async
+from .geocoding import distance_miles, geocode_city, weather_cell
+from .preferences import read_user_prefs
+from .providers import get_location_weather
+from .route import parse_route_input, sample_route
+from .telemetry import record_error, traced_tool
+from .weather import matches_condition
+
+# Warm-places search over a place catalog. Places are bucketed into a lat/lon grid so a radius
+# query only looks at nearby cells, and places that fall in the same small weather cell share
+# one (cached) current-weather lookup instead of one each. A search along a route takes the
+# places within WARM_PLACES_CORRIDOR_MILES of points sampled along it.
+# The bundled nomad_places.csv is a starter sample of about 240 US places, not a full catalog:
+# radius searches away from those places find little, and searches without a center sample one
+# place per 4-degree cell of it. For real use point NOMADICSKY_PLACES_CATALOG at a bigger file,
+# either a CSV with the same columns (name,region,country,lat,lon) or a GeoNames cities dump
+# (e.g. cities5000.txt from download.geonames.org/export/dump/, tab-separated), optionally
+# trimmed with NOMADICSKY_PLACES_MIN_POPULATION.
+PLACES_CATALOG_PATH = os.environ.get(
+    "NOMADICSKY_PLACES_CATALOG", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "nomad_places.csv")
+)
+PLACES_MIN_POPULATION = int(os.environ.get("NOMADICSKY_PLACES_MIN_POPULATION", 0))
+PLACES_GRID_DEGREES = 1.0
+WARM_TEMP_THRESHOLD = 75.0
+WARM_PLACES_DEFAULT_RADIUS = 300  # miles
+WARM_PLACES_CORRIDOR_MILES = 50  # either side of a route
+WARM_PLACES_MAX_CANDIDATES = int(os.environ.get("NOMADICSKY_WARM_PLACES_MAX_CANDIDATES", 150))
+WARM_PLACES_MAX_RESULTS = 10
+
+class PlaceIndex:
+    def __init__(self, places, cell_degrees=PLACES_GRID_DEGREES):
+        self.places = places
+        self.cell_degrees = cell_degrees
+        self.cells = {}
+        for place in places:
+            self.cells.setdefault(self._cell(place["lat"], place["lon"]), []).append(place)
+
+    def _cell(self, lat, lon):
+        return (math.floor(lat / self.cell_degrees), math.floor(lon / self.cell_degrees))
+
+    # Places within radius_miles of a point, nearest first, as (distance, place) pairs
+    def within(self, lat, lon, radius_miles):
+        lat_span = radius_miles / 69.0
+        lon_span = radius_miles / max(69.0 * math.cos(math.radians(lat)), 1.0)
+        min_cell = self._cell(lat - lat_span, lon - lon_span)
+        max_cell = self._cell(lat + lat_span, lon + lon_span)
+        found = []
+        for cell_lat in range(min_cell[0], max_cell[0] + 1):
+            for cell_lon in range(min_cell[1], max_cell[1] + 1):
+                for place in self.cells.get((cell_lat, cell_lon), ()):
+                    distance = distance_miles(lat, lon, place["lat"], place["lon"])
+                    if distance <= radius_miles:
+                        found.append((distance, place))
+        found.sort(key=lambda pair: pair[0])
+        return found
+
+    # One place per coarse grid cell, for searches with no center point
+    def sample(self, cell_degrees):
+        seen = {}
+        for place in self.places:
+            key = (math.floor(place["lat"] / cell_degrees), math.floor(place["lon"] / cell_degrees))
+            seen.setdefault(key, place)
+        return list(seen.values())
+
+_place_index = None
+_place_index_lock = threading.Lock()
+
+def _place(name, region, country, lat, lon):
+    return {"name": name, "label": f"{name},{region},{country}", "lat": float(lat), "lon": float(lon)}
+
+# Function to read a catalog file: our CSV, or a GeoNames dump (.txt, tab-separated, no header)
+def read_place_catalog(path):
+    with open(path, newline="", encoding="utf-8") as file:
+        if path.endswith(".txt"):
+            # GeoNames columns: 1 name, 4 latitude, 5 longitude, 8 country code, 10 admin1 code, 14 population
+            return [
+                _place(row[1], row[10], row[8], row[4], row[5])
+                for row in csv.reader(file, delimiter="\t", quoting=csv.QUOTE_NONE)
+                if len(row) > 14 and int(row[14] or 0) >= PLACES_MIN_POPULATION
+            ]
+        return [_place(row["name"], row["region"], row["country"], row["lat"], row["lon"]) for row in csv.DictReader(file)]
+
+def load_place_index():
+    global _place_index
+    with _place_index_lock:
+        if _place_index is None:
+            _place_index = PlaceIndex(read_place_catalog(PLACES_CATALOG_PATH))
+        return _place_index
+
+# Places within radius_miles of a route (a list of (lat, lon) points), nearest the route first,
+# as (distance from the route, place) pairs
+def corridor_places(index, points, radius_miles):
+    # Samples half a radius apart leave no gaps wider than the corridor
+    samples, _ = sample_route(points, max(radius_miles / 2, 5.0))
+    nearest = {}
+    for lat, lon, _, _ in samples:
+        for distance, place in index.within(lat, lon, radius_miles):
+            if place["label"] not in nearest or distance < nearest[place["label"]][0]:
+                nearest[place["label"]] = (distance, place)
+    return sorted(nearest.values(), key=lambda pair: pair[0])
+
+# Function to stream current weather for catalog places near a point, along a route (or across
+# the whole catalog), yielding one result per place as its weather cell comes back
+def iter_place_weather(center=None, radius_miles=WARM_PLACES_DEFAULT_RADIUS, use_cache=True, route=None):
+    index = load_place_index()
+    if route is not None:
+        candidates = corridor_places(index, route, radius_miles)[:WARM_PLACES_MAX_CANDIDATES]
+    elif center is not None:
+        candidates = index.within(center[0], center[1], radius_miles)[:WARM_PLACES_MAX_CANDIDATES]
+    else:
+        candidates = [(None, place) for place in index.sample(4.0)][:WARM_PLACES_MAX_CANDIDATES]
+    cells = {}
+    for distance, place in candidates:
+        cells.setdefault(weather_cell(place["lat"], place["lon"]), []).append((distance, place))
+    cell_keys = list(cells)
+
+    def fetch_cell(cell):
+        return get_location_weather(cell[0], cell[1], use_cache=use_cache, combined=False, forecast=False)
+
+    for index_in_batch, result in iter_fetch_many(fetch_cell, cell_keys):
+        # A cell whose fetch raised comes back as an {"error"} dict rather than (status, record)
+        if isinstance(result, dict):
+            status, detail = "exception", result["error"]
+        else:
+            status, record = result
+            detail = status
+        for distance, place in cells[cell_keys[index_in_batch]]:
+            if status != 200:
+                yield {"city": place["label"], "error": f"Error fetching weather for {place['label']}: {detail}",
+                       "status": status}
+                continue
+            yield {
+                "city": place["label"],
+                "temp": record.current.temp,
+                "description": record.current.description,
+                "distance": None if distance is None else round(distance)
+            }
+
+_RADIUS_PATTERN = re.compile(
+    r"within\s+(\d+(?:\.\d+)?)\s*(miles?|mi|km|kilometers?)\s+(?:of|from|around)\s+(.+?)\s*[?.!]*$", re.IGNORECASE
+)
+_NEAR_PATTERN = re.compile(r"\b(?:near|around|close to)\s+(.+?)\s*[?.!]*$", re.IGNORECASE)
+_WITHIN_PATTERN = re.compile(r"within\s+(\d+(?:\.\d+)?)\s*(miles?|mi|km|kilometers?)\b", re.IGNORECASE)
+# "along the route from Knoxville to Tucson", "on the way from A to B", "between A and B",
+# "along Knoxville -> Nashville -> Memphis"
+_ROUTE_PATTERN = re.compile(
+    r"\b(?:along(?:\s+(?:the|my))?(?:\s+(?:route|way|drive|road))?(?:\s+from)?|(?:route|way|drive)\s+from|between)\s+"
+    r"(.+?)\s*[?.!]*$", re.IGNORECASE
+)
+
+def _radius_miles(query, default):
+    match = _WITHIN_PATTERN.search(query)
+    if not match:
+        return default
+    radius = float(match.group(1))
+    return radius / 1.609 if match.group(2).lower().startswith("k") else radius
+
+# Function to read where a warm-places query searches: {"center", "route", "radius", "area"} or {"error"}
+def parse_warm_places_query(query):
+    match = _ROUTE_PATTERN.search(query)
+    if match:
+        route_text = re.sub(r"\band\b", "to", match.group(1), flags=re.IGNORECASE)
+        waypoints = parse_route_input(route_text)["waypoints"]
+        if len(waypoints) < 2:
+            return {"error": "Please name at least two places for the route (e.g., 'along the route from Knoxville to Tucson')."}
+        radius = _radius_miles(query, WARM_PLACES_CORRIDOR_MILES)
+        geos = fetch_many(geocode_city, waypoints)
+        for waypoint, geo in zip(waypoints, geos):
+            if "error" in geo:
+                return {"error": f"I couldn't find {waypoint} on your route. Try a city like 'Knoxville' or 'Tucson'."}
+        return {"center": None, "route": [(geo["lat"], geo["lon"]) for geo in geos], "radius": radius,
+                "area": f"within {round(radius)} miles of the route {' -> '.join(geo['city'] for geo in geos)}"}
+    radius = _radius_miles(query, WARM_PLACES_DEFAULT_RADIUS)
+    match = _RADIUS_PATTERN.search(query)
+    if match:
+        location = match.group(3)
+    else:
+        match = _NEAR_PATTERN.search(query)
+        location = match.group(1) if match else None
+    if not location:
+        return {"center": None, "route": None, "radius": radius, "area": ""}
+    geo = geocode_city(location)
+    if "error" in geo:
+        return {"error": f"I couldn't find {location} to search around. Try a city like 'Knoxville' or 'Tucson'."}
+    return {"center": (geo["lat"], geo["lon"]), "route": None, "radius": radius,
+            "area": f"within {round(radius)} miles of {geo['city']}"}
+
+# Function to stream warm places as the catalog's weather comes back: yields the ranked
+# {"area", "condition_preference", "places"} result (or {"error"}) each time the top places change,
+# and the complete ranking last
+def stream_warm_places(query):
+    spec = parse_warm_places_query(query)
+    if "error" in spec:
+        yield spec
+        return
+    prefs = read_user_prefs()
+    condition_preference = prefs.get("weather_condition_preference")
+    warm_places = []
+    ranking = None
+    for result in iter_place_weather(spec["center"], spec["radius"], route=spec["route"]):
+        if "error" in result:
+            # Counted on the search span and in nomadicsky_errors_total; one missing place isn't fatal
+            record_error("warm_places", result["status"])
+            continue
+        if result["temp"] >= WARM_TEMP_THRESHOLD:
+            result["matches_preferences"] = bool(condition_preference) and matches_condition(result["description"], condition_preference)
+            warm_places.append(result)
+            # Places matching the weather condition preference first, then warmest first
+            warm_places.sort(key=lambda x: (x["matches_preferences"], x["temp"]), reverse=True)
+            if len(warm_places) > WARM_PLACES_MAX_RESULTS and warm_places.pop() is result:
+                # Not among the top places, so the ranking hasn't changed
+                continue
+            ranking = {"area": spec["area"], "condition_preference": condition_preference, "places": list(warm_places)}
+            yield ranking
+    if ranking is None:
+        yield {"area": spec["area"], "condition_preference": condition_preference, "places": []}
+
+# Function to find warm places, as structured data: {"area", "condition_preference", "places"} or {"error"}
+@traced_tool
+def search_warm_places(query):
+    for result in stream_warm_places(query):
+        pass
+    return result
+
+# Function to find warm places, as a text answer
+def find_warm_places(query):
+    return format_warm_places(search_warm_places(query))
+
+def format_warm_places(result):
+    if "error" in result:
+        return result["error"]
+    area = f" {result['area']}" if result["area"] else ""
+    condition_preference = result["condition_preference"]
+    if result["places"]:
+        response = f"Here are some warm places{area}:\n"
+        for place in result["places"]:
+            distance = f" ({place['distance']} mi away)" if place["distance"] is not None else ""
+            match_note = f" - matches your {condition_preference} preference" if place["matches_preferences"] else ""
+            response += f"- {place['city']}: {place['temp']}°F, {place['description']}{distance}{match_note}\n"
+        return response.strip()
+    else:
+        return f"No warm places found{area} (temperature >= {WARM_TEMP_THRESHOLD:.0f}°F)."
+
+async def afind_warm_places(query):
+    return await run_tool_async(find_warm_places, query)
+
+async def asearch_warm_places(query):
+    return await run_tool_async(search_warm_places, query)
@@ -0,0 +1,173 @@
+from .fanout import fetch_many, run_tool_async
+from .geocoding import geocode_city
+from .preferences import preference_backend, read_user_prefs, resolve_user_id
+from .telemetry import traced_tool
+from .weather import get_current_weather, get_weather_forecast, matches_condition
+
+# Tool to update user preferences
+@traced_tool
+def update_user_preferences(input_str, user_id=None):
+    user_id = resolve_user_id(user_id)
+    backend = preference_backend()
+    # Simple parsing: look for "I like [city/weather condition]" or "I prefer [temp] weather"
+    if "I like" in input_str:
+        input_part = input_str.split("I like", 1)[1].strip().lower()
+        # Check for weather condition preference (e.g., "I like sunny weather")
+        if "weather" in input_part:
+            condition = input_part.split("weather")[0].strip()
+            valid_conditions = ["sunny", "cloudy", "rainy", "clear"]
+            if condition in valid_conditions:
+                backend.set_preference(user_id, "weather_condition_preference", condition)
+                return f"Got it! I've set your preferred weather condition to {condition}."
+            else:
+                return f"I didn't understand that weather condition. Try saying 'I like sunny weather' or 'I like rainy weather'."
+        # Otherwise, assume it's a city (e.g., "I like Knoxville")
+        else:
+            city = input_str.split("I like", 1)[1].strip()
+            # Validate city through the geocoding cache
+            if "error" in geocode_city(city):
+                return f"I couldn't find {city} to add it to your preferred cities. Could you try a different city, like 'Knoxville' or 'Tucson', or double-check the spelling?"
+            if backend.add_city(user_id, city):
+                return f"Got it! I've added {city} to your preferred cities."
+            else:
+                return f"{city} is already in your preferred cities!"
+    elif "I prefer" in input_str and "weather" in input_str:
+        # Extract temperature preference (e.g., "I prefer warm weather")
+        temp_part = input_str.split("I prefer", 1)[1].split("weather")[0].strip()
+        if "warm" in temp_part.lower():
+            temperature_preference = "warm"
+        elif "cool" in temp_part.lower() or "cold" in temp_part.lower():
+            temperature_preference = "cool"
+        else:
+            return "I didn't understand your temperature preference. Try saying 'I prefer warm weather' or 'I prefer cool weather'."
+        backend.set_preference(user_id, "temperature_preference", temperature_preference)
+        return f"Updated your temperature preference to {temperature_preference} weather."
+    else:
+        return "I didn't understand your preference. Try saying 'I like Knoxville', 'I like sunny weather', or 'I prefer warm weather'."
+
+# Tool to retrieve user preferences
+@traced_tool
+def get_user_preferences(query, user_id=None):
+    prefs = read_user_prefs(user_id)
+    preferred_cities = prefs.get("preferred_cities", [])
+    temp_preference = prefs.get("temperature_preference", None)
+    weather_condition_preference = prefs.get("weather_condition_preference", None)
+
+    if not preferred_cities and not temp_preference and not weather_condition_preference:
+        return "I don't have any preferences stored for you yet. You can tell me your preferences, like 'I like Knoxville', 'I prefer warm weather', or 'I like sunny weather'."
+
+    # If the query explicitly asks for preferences, list them
+    if "what are my preferences" in query.lower():
+        response = "Here are your preferences:\n"
+        if preferred_cities:
+            response += f"- Preferred cities: {', '.join(preferred_cities)}\n"
+        if temp_preference:
+            response += f"- Temperature preference: {temp_preference} weather\n"
+        if weather_condition_preference:
+            response += f"- Weather condition preference: {weather_condition_preference}\n"
+        return response.strip()
+
+    # Proactively use preferences for weather-related queries
+    response = ""
+    if preferred_cities:
+        # Handle forecast queries for preferred cities
+        if "forecast" in query.lower():
+            # Acknowledge variations like "this week"
+            time_frame = "5-day"
+            if "this week" in query.lower():
+                time_frame = "next 5 days (this week's forecast)"
+            response += f"Let me check the {time_frame} forecast for your preferred cities:\n"
+            forecasts = fetch_many(get_weather_forecast, preferred_cities)
+            for city, forecast_data in zip(preferred_cities, forecasts):
+                if "error" in forecast_data:
+                    response += f"- {city}: {forecast_data['error']}\n"
+                    continue
+                response += f"\n{city} forecast:\n"
+                for day in forecast_data["forecast"]:
+                    matches_preferences = True
+                    mismatch_reason = ""
+                    # Check if the day's average temperature matches the temperature preference
+                    if temp_preference == "warm" and day["avg_temp"] < 75.0:
+                        matches_preferences = False
+                        mismatch_reason += f" (avg temp {day['avg_temp']}°F too cool for your {temp_preference} preference)"
+                    elif temp_preference == "cool" and day["avg_temp"] >= 75.0:
+                        matches_preferences = False
+                        mismatch_reason += f" (avg temp {day['avg_temp']}°F too warm for your {temp_preference} preference)"
+                    # Check if the day's weather condition matches the preference
+                    if weather_condition_preference:
+                        if not matches_condition(day["description"], weather_condition_preference):
+                            matches_preferences = False
+                            mismatch_reason += f" (not {weather_condition_preference})"
+                    response += f"- {day['date']}: Avg {day['avg_temp']}°F (High {day['high_temp']}°F, Low {day['low_temp']}°F), {day['description']}{mismatch_reason}\n"
+                    if matches_preferences:
+                        response += f"  **This day matches your preferences for {temp_preference} and {weather_condition_preference} weather!**\n"
+            response += "\nWould you like a forecast for another city or more details?"
+            return response.strip()
+
+        # Handle current weather queries (as before)
+        if "weather" in query.lower() or "find" in query.lower():
+            matching_cities = []
+            non_matching_cities = []
+            for weather in fetch_many(get_current_weather, preferred_cities):
+                if "error" in weather:
+                    continue
+                matches_conditions = True
+                mismatch_reason = ""
+                # Check temperature preference
+                if temp_preference == "warm" and weather["temp"] < 75.0:
+                    matches_conditions = False
+                    mismatch_reason += f" (too cool for your {temp_preference} preference)"
+                elif temp_preference == "cool" and weather["temp"] >= 75.0:
+                    matches_conditions = False
+                    mismatch_reason += f" (too warm for your {temp_preference} preference)"
+                # Check weather condition preference with mapping
+                if weather_condition_preference:
+                    if not matches_condition(weather["description"], weather_condition_preference):
+                        matches_conditions = False
+                        mismatch_reason += f" (not {weather_condition_preference})"
+                if matches_conditions:
+                    matching_cities.append(weather)
+                else:
+                    non_matching_cities.append(weather)
+
+            # Report matching cities first
+            if matching_cities:
+                response += "Based on your preferences, here are some matching cities:\n"
+                for city_weather in matching_cities:
+                    response += f"- {city_weather['city']}: {city_weather['temp']}°F, {city_weather['description']}\n"
+
+            # Always report weather for preferred cities, even if they don't match
+            if preferred_cities:
+                response += "Here’s the current weather in your preferred cities:\n"
+                for city_weather in (matching_cities + non_matching_cities):
+                    mismatch_reason = ""
+                    if city_weather not in matching_cities:
+                        if temp_preference == "warm" and city_weather["temp"] < 75.0:
+                            mismatch_reason += f" (too cool for your {temp_preference} preference)"
+                        elif temp_preference == "cool" and city_weather["temp"] >= 75.0:
+                            mismatch_reason += f" (too warm for your {temp_preference} preference)"
+                        if weather_condition_preference and not matches_condition(city_weather["description"], weather_condition_preference):
+                            mismatch_reason += f" (not {weather_condition_preference})"
+                    response += f"- {city_weather['city']}: {city_weather['temp']}°F, {city_weather['description']}{mismatch_reason}\n"
+            else:
+                response += "You haven't set any preferred cities yet. Would you like to add one, like 'I like Tucson'?\n"
+
+            response += "Would you like to check the weather in another city or update your preferences?"
+
+    # If query isn't weather-related, list preferences
+    if not response:
+        response = "Here are your preferences:\n"
+        if preferred_cities:
+            response += f"- Preferred cities: {', '.join(preferred_cities)}\n"
+        if temp_preference:
+            response += f"- Temperature preference: {temp_preference} weather\n"
+        if weather_condition_preference:
+            response += f"- Weather condition preference: {weather_condition_preference}\n"
+
+    return response.strip()
+
+async def aupdate_user_preferences(input_str, user_id=None):
+    return await run_tool_async(update_user_preferences, input_str, user_id)
+
+async def aget_user_preferences(query, user_id=None):
+    return await run_tool_async(get_user_preferences, query, user_id)
@@ -0,0 +1,331 @@
+import contextvars
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from .fanout import fetch_many
+from .geocoding import geocode_city, normalize_city_key
+
+# User preferences live in a pluggable backend keyed by user ID: SQLite by default (one row
+# per user plus one row per preferred city, WAL mode so readers don't block), an in-memory
+# backend for tests, or the legacy single-user user_prefs.json file. Tools act for the user
+# in current_user_id, which PreprocessedAgentExecutor sets from the "user_id" input.
+USER_PREFS_PATH = os.environ.get("NOMADICSKY_USER_PREFS", "user_prefs.json")
+PREFS_BACKEND = os.environ.get("NOMADICSKY_PREFS_BACKEND", "sqlite")
+PREFS_DB_PATH = os.environ.get("NOMADICSKY_PREFS_DB", "user_prefs.db")
+DEFAULT_USER_ID = "default"
+PREFERENCE_FIELDS = ("temperature_preference", "weather_condition_preference")
+
+current_user_id = contextvars.ContextVar("current_user_id", default=DEFAULT_USER_ID)
+
+def resolve_user_id(user_id=None):
+    return user_id or current_user_id.get()
+
+# Single-file JSON preference storage (legacy, single user). Cities are validated once, when they are added,
+# and the file records that with "validated_at". Updates hold a lock file for the whole
+# read-modify-write, so concurrent processes don't lose each other's changes; the write goes
+# to a temp file that is renamed over user_prefs.json. Reads are served from an in-memory
+# copy that is only reloaded when the file's mtime changes.
+_prefs_lock = threading.RLock()
+_prefs_cache = {"mtime": None, "prefs": None}
+_prefs_file_lock_depth = [0]  # how deeply the thread holding _prefs_lock holds the file lock
+
+def default_user_prefs():
+    return {"preferred_cities": [], "temperature_preference": None, "weather_condition_preference": None}
+
+def _copy_prefs(prefs):
+    return dict(prefs, preferred_cities=list(prefs.get("preferred_cities", [])))
+
+@contextmanager
+def _prefs_file_lock():
+    # Cross-process lock on a sidecar file, on top of the in-process lock. Reentrant: a write
+    # inside a read-modify-write reuses the lock the update already holds.
+    with _prefs_lock:
+        if _prefs_file_lock_depth[0]:
+            _prefs_file_lock_depth[0] += 1
+            try:
+                yield
+            finally:
+                _prefs_file_lock_depth[0] -= 1
+            return
+        with open(USER_PREFS_PATH + ".lock", "a+") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            _prefs_file_lock_depth[0] = 1
+            try:
+                yield
+            finally:
+                _prefs_file_lock_depth[0] = 0
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+def _read_prefs_file():
+    try:
+        mtime = os.stat(USER_PREFS_PATH).st_mtime_ns
+    except FileNotFoundError:
+        return default_user_prefs()
+    with _prefs_lock:
+        if _prefs_cache["mtime"] == mtime:
+            return _copy_prefs(_prefs_cache["prefs"])
+        try:
+            with open(USER_PREFS_PATH, "r") as file:
+                prefs = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            # If file doesn't exist or is invalid, return default structure
+            return default_user_prefs()
+        if not isinstance(prefs, dict):
+            return default_user_prefs()
+        if "validated_at" not in prefs:
+            # Files written before validation was tracked: validate their cities once
+            cities = prefs.get("preferred_cities", [])
+            geocoded = fetch_many(geocode_city, cities)
+            prefs["preferred_cities"] = [
+                city for city, geo in zip(cities, geocoded) if geo.get("status") != 404
+            ]
+            _write_prefs_file(prefs)  # Save validated preferences
+            return _copy_prefs(prefs)
+        _prefs_cache["mtime"] = mtime
+        _prefs_cache["prefs"] = prefs
+        return _copy_prefs(prefs)
+
+# Callers validate new cities before writing, so every write marks the file as validated
+def _write_prefs_file(prefs):
+    prefs = dict(prefs, validated_at=time.time())
+    directory = os.path.dirname(os.path.abspath(USER_PREFS_PATH))
+    with _prefs_file_lock():
+        with tempfile.NamedTemporaryFile("w", dir=directory, prefix=".user_prefs.", suffix=".tmp", delete=False) as file:
+            json.dump(prefs, file, indent=4)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(file.name, USER_PREFS_PATH)
+        _prefs_cache["mtime"] = os.stat(USER_PREFS_PATH).st_mtime_ns
+        _prefs_cache["prefs"] = prefs
+
+class PreferenceBackend:
+    def get(self, user_id):
+        raise NotImplementedError
+
+    def save(self, user_id, prefs):
+        raise NotImplementedError
+
+    def add_city(self, user_id, city):
+        raise NotImplementedError
+
+    def set_preference(self, user_id, field, value):
+        raise NotImplementedError
+
+    def users_with_city(self, city):
+        raise NotImplementedError
+
+    # Every city in anyone's preferences, once each
+    def all_cities(self):
+        raise NotImplementedError
+
+class InMemoryPreferenceBackend(PreferenceBackend):
+    def __init__(self):
+        self._users = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            return _copy_prefs(self._users.get(user_id) or default_user_prefs())
+
+    def save(self, user_id, prefs):
+        with self._lock:
+            self._users[user_id] = _copy_prefs(prefs)
+
+    def add_city(self, user_id, city):
+        with self._lock:
+            prefs = self._users.setdefault(user_id, default_user_prefs())
+            if normalize_city_key(city) in {normalize_city_key(c) for c in prefs["preferred_cities"]}:
+                return False
+            prefs["preferred_cities"].append(city)
+            return True
+
+    def set_preference(self, user_id, field, value):
+        with self._lock:
+            self._users.setdefault(user_id, default_user_prefs())[field] = value
+
+    def users_with_city(self, city):
+        key = normalize_city_key(city)
+        with self._lock:
+            return sorted(
+                user_id for user_id, prefs in self._users.items()
+                if key in {normalize_city_key(c) for c in prefs["preferred_cities"]}
+            )
+
+    def all_cities(self):
+        cities = {}
+        with self._lock:
+            for prefs in self._users.values():
+                for city in prefs["preferred_cities"]:
+                    cities.setdefault(normalize_city_key(city), city)
+        return list(cities.values())
+
+class JsonFilePreferenceBackend(PreferenceBackend):
+    # Single-user: every user ID maps to the one user_prefs.json file
+    def get(self, user_id):
+        return _read_prefs_file()
+
+    def save(self, user_id, prefs):
+        _write_prefs_file(prefs)
+
+    def add_city(self, user_id, city):
+        with _prefs_file_lock():
+            prefs = _read_prefs_file()
+            if normalize_city_key(city) in {normalize_city_key(c) for c in prefs["preferred_cities"]}:
+                return False
+            prefs["preferred_cities"].append(city)
+            _write_prefs_file(prefs)
+            return True
+
+    def set_preference(self, user_id, field, value):
+        with _prefs_file_lock():
+            prefs = _read_prefs_file()
+            prefs[field] = value
+            _write_prefs_file(prefs)
+
+    def users_with_city(self, city):
+        key = normalize_city_key(city)
+        prefs = _read_prefs_file()
+        return [DEFAULT_USER_ID] if key in {normalize_city_key(c) for c in prefs["preferred_cities"]} else []
+
+    def all_cities(self):
+        return _read_prefs_file()["preferred_cities"]
+
+class SQLitePreferenceBackend(PreferenceBackend):
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as db:
+            db.executescript(
+                "CREATE TABLE IF NOT EXISTS users ("
+                " user_id TEXT PRIMARY KEY, temperature_preference TEXT,"
+                " weather_condition_preference TEXT, updated_at REAL);"
+                "CREATE TABLE IF NOT EXISTS preferred_cities ("
+                " user_id TEXT, city_key TEXT, city TEXT, position INTEGER,"
+                " PRIMARY KEY (user_id, city_key));"
+                "CREATE INDEX IF NOT EXISTS preferred_cities_by_city ON preferred_cities (city_key);"
+            )
+
+    # One connection per thread; WAL lets readers run alongside a writer
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, user_id):
+        db = self._connect()
+        row = db.execute(
+            "SELECT temperature_preference, weather_condition_preference FROM users WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        cities = [city for (city,) in db.execute(
+            "SELECT city FROM preferred_cities WHERE user_id = ? ORDER BY position", (user_id,)
+        )]
+        prefs = default_user_prefs()
+        prefs["preferred_cities"] = cities
+        if row is not None:
+            prefs["temperature_preference"], prefs["weather_condition_preference"] = row
+        return prefs
+
+    def _touch_user(self, db, user_id):
+        db.execute(
+            "INSERT INTO users (user_id, updated_at) VALUES (?, ?)"
+            " ON CONFLICT (user_id) DO UPDATE SET updated_at = excluded.updated_at",
+            (user_id, time.time())
+        )
+
+    def save(self, user_id, prefs):
+        with self._connect() as db:
+            self._touch_user(db, user_id)
+            db.execute(
+                "UPDATE users SET temperature_preference = ?, weather_condition_preference = ? WHERE user_id = ?",
+                (prefs.get("temperature_preference"), prefs.get("weather_condition_preference"), user_id)
+            )
+            db.execute("DELETE FROM preferred_cities WHERE user_id = ?", (user_id,))
+            db.executemany(
+                "INSERT OR IGNORE INTO preferred_cities (user_id, city_key, city, position) VALUES (?, ?, ?, ?)",
+                [(user_id, normalize_city_key(city), city, position)
+                 for position, city in enumerate(prefs.get("preferred_cities", []))]
+            )
+
+    def add_city(self, user_id, city):
+        with self._connect() as db:
+            self._touch_user(db, user_id)
+            cursor = db.execute(
+                "INSERT OR IGNORE INTO preferred_cities (user_id, city_key, city, position)"
+                " SELECT ?, ?, ?, COALESCE(MAX(position), -1) + 1 FROM preferred_cities WHERE user_id = ?",
+                (user_id, normalize_city_key(city), city, user_id)
+            )
+            return cursor.rowcount == 1
+
+    def set_preference(self, user_id, field, value):
+        if field not in PREFERENCE_FIELDS:
+            raise ValueError(f"Unknown preference: {field}")
+        with self._connect() as db:
+            self._touch_user(db, user_id)
+            db.execute(f"UPDATE users SET {field} = ? WHERE user_id = ?", (value, user_id))
+
+    def users_with_city(self, city):
+        return [user_id for (user_id,) in self._connect().execute(
+            "SELECT user_id FROM preferred_cities WHERE city_key = ? ORDER BY user_id", (normalize_city_key(city),)
+        )]
+
+    def all_cities(self):
+        return [city for (city,) in self._connect().execute(
+            "SELECT MIN(city) FROM preferred_cities GROUP BY city_key ORDER BY COUNT(*) DESC, city_key"
+        )]
+
+_preference_backend = None
+_preference_backend_lock = threading.Lock()
+
+def preference_backend():
+    global _preference_backend
+    with _preference_backend_lock:
+        if _preference_backend is None:
+            if PREFS_BACKEND == "memory":
+                _preference_backend = InMemoryPreferenceBackend()
+            elif PREFS_BACKEND == "json":
+                _preference_backend = JsonFilePreferenceBackend()
+            else:
+                is_new = not os.path.exists(PREFS_DB_PATH)
+                _preference_backend = SQLitePreferenceBackend(PREFS_DB_PATH)
+                # Carry an existing single-user file over to the default user
+                if is_new and os.path.exists(USER_PREFS_PATH):
+                    _preference_backend.save(DEFAULT_USER_ID, _read_prefs_file())
+        return _preference_backend
+
+def set_preference_backend(backend):
+    global _preference_backend
+    with _preference_backend_lock:
+        _preference_backend = backend
+
+def read_user_prefs(user_id=None):
+    return preference_backend().get(resolve_user_id(user_id))
+
+def write_user_prefs(prefs, user_id=None):
+    preference_backend().save(resolve_user_id(user_id), prefs)
+
+def users_with_preferred_city(city):
+    return preference_backend().users_with_city(city)
+
+def all_preferred_cities():
+    return preference_backend().all_cities()
@@ -0,0 +1,123 @@
+import os
+import threading
+import time
+
+from .geocoding import geocode_city, weather_cell
+from .places import load_place_index
+from .preferences import all_preferred_cities
+from .providers import active_provider_client, get_location_weather, location_ttl_remaining
+from .telemetry import span
+
+# Background cache pre-warmer. Every PREWARM_INTERVAL seconds it refreshes forecasts for every
+# city in anyone's stored preferences, plus a hot list (NOMADICSKY_PREWARM_CITIES, separated by
+# ";"), and optionally current conditions for the warm-places catalog sample, so user-facing
+# lookups are served from a fresh cache. Only entries that would expire before the next cycle
+# are fetched: a forecast lasts FORECAST_TTL (3 h), so with the 30-minute default each city
+# costs about 9 requests a day. Current conditions for the cities are not kept fresh: those
+# from a One Call refresh only count for CURRENT_WEATHER_TTL, and refreshing every city that
+# often would use up One Call's daily allowance. Catalog cells expire after CURRENT_WEATHER_TTL,
+# so they are refreshed once per cycle, from whatever budget the cities leave. Requests are
+# paced to use at most PREWARM_REQUEST_SHARE of the provider's rate limit and daily quota,
+# leaving the rest for user queries. stop() ends the thread promptly, even mid-cycle.
+PREWARM_ENABLED = os.environ.get("NOMADICSKY_PREWARM", "") not in ("", "0", "false")
+PREWARM_INTERVAL = float(os.environ.get("NOMADICSKY_PREWARM_INTERVAL", 30 * 60))
+PREWARM_HOT_CITIES = [city.strip() for city in os.environ.get("NOMADICSKY_PREWARM_CITIES", "").split(";") if city.strip()]
+PREWARM_CATALOG = os.environ.get("NOMADICSKY_PREWARM_CATALOG", "") not in ("", "0", "false")
+PREWARM_REQUEST_SHARE = float(os.environ.get("NOMADICSKY_PREWARM_REQUEST_SHARE", 0.5))
+
+class CachePrewarmer:
+    def __init__(self, interval=PREWARM_INTERVAL, hot_cities=None, include_catalog=PREWARM_CATALOG,
+                 request_share=PREWARM_REQUEST_SHARE):
+        self.interval = interval
+        self.hot_cities = PREWARM_HOT_CITIES if hot_cities is None else list(hot_cities)
+        self.include_catalog = include_catalog
+        self.request_share = request_share
+        self.stats = {"cycles": 0, "refreshed": 0, "fresh": 0, "errors": 0, "deferred": 0, "last_cycle_seconds": 0.0}
+        self._stop = threading.Event()
+        self._thread = None
+
+    # (lat, lon, combined) for everything the pre-warmer keeps fresh, most requested first.
+    # Cities get forecasts; catalog cells only current conditions.
+    def targets(self):
+        points = {}
+        for city in all_preferred_cities() + self.hot_cities:
+            geo = geocode_city(city)
+            if "error" not in geo:
+                points.setdefault((geo["lat"], geo["lon"], True), None)
+        if self.include_catalog:
+            # The cells the no-center warm-places search looks up
+            for lat, lon in sorted({weather_cell(place["lat"], place["lon"]) for place in load_place_index().sample(4.0)}):
+                points.setdefault((lat, lon, False), None)
+        return list(points)
+
+    def _request_budget(self):
+        bucket = active_provider_client().bucket
+        spacing = 1 / (bucket.rate * self.request_share)
+        if not bucket.daily_limit:
+            return spacing, None
+        # This cycle's slice of the daily quota share, and never more than that share of what is left today
+        cycles_per_day = max(86400 / self.interval, 1)
+        headroom = (bucket.daily_limit - bucket.used_today) * self.request_share
+        return spacing, max(int(min(headroom, bucket.daily_limit * self.request_share / cycles_per_day)), 0)
+
+    # Function to refresh every target that would go stale before the next cycle
+    def run_once(self):
+        started = time.perf_counter()
+        spacing, budget = self._request_budget()
+        targets = self.targets()
+        due = [target for target in targets
+               if location_ttl_remaining(*target) <= self.interval]
+        self.stats["fresh"] += len(targets) - len(due)
+        for index, (lat, lon, combined) in enumerate(due):
+            if self._stop.is_set():
+                break
+            if budget is not None and index >= budget:
+                self.stats["deferred"] += len(due) - index
+                break
+            status, _ = get_location_weather(lat, lon, refresh=True, combined=combined, current=not combined,
+                                             forecast=combined)
+            self.stats["refreshed" if status == 200 else "errors"] += 1
+            self._stop.wait(spacing)
+        self.stats["cycles"] += 1
+        self.stats["last_cycle_seconds"] = round(time.perf_counter() - started, 3)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                # A failed cycle shows up as a "prewarm" span with its error type
+                with span("prewarm", "cycle"):
+                    self.run_once()
+            except Exception as exc:
+                self.stats["errors"] += 1
+                self.stats["last_error"] = f"{type(exc).__name__}: {exc}"
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="nomadicsky-prewarm", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+_prewarmer = None
+_prewarmer_lock = threading.Lock()
+
+# Start the shared pre-warmer (once); pass settings to override the NOMADICSKY_PREWARM_* defaults
+def start_prewarmer(**settings):
+    global _prewarmer
+    with _prewarmer_lock:
+        if _prewarmer is None:
+            _prewarmer = CachePrewarmer(**settings)
+        return _prewarmer.start()
+
+def stop_prewarmer(timeout=None):
+    global _prewarmer
+    with _prewarmer_lock:
+        prewarmer, _prewarmer = _prewarmer, None
+    if prewarmer is not None:
+        prewarmer.stop(timeout)
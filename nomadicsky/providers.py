@@ -0,0 +1,260 @@
+import datetime
+import functools
+import os
+import re
+import sys
+import threading
+from collections import Counter
+
+import requests
+
+from .cache import (
+    CURRENT_WEATHER_TTL, FORECAST_TTL, RESPONSE_CACHE_DISABLED, fetch_owm_json, owm_cache_key, response_cache
+)
+from .config import load_api_key
+from .http_client import ProviderQuotaExceeded, provider_client
+from .records import CurrentConditions, DailySummary, ForecastSeries, LocationWeather, loads
+from .telemetry import record_cache_lookup
+
+# Weather data sources. Every tool reads one per-location LocationWeather record (records.py):
+# provider, lat, lon, utc_offset, current conditions, time-ordered forecast slots and
+# per-day summaries in local time.
+# NOMADICSKY_WEATHER_PROVIDER picks where it comes from:
+#   onecall (default)  OWM One Call 3.0: current, 48 hourly and 8 daily points in one request.
+#                      Keys without a One Call subscription get 401, after which we use classic.
+#   nws                api.weather.gov hourly gridpoint forecast (US only; the /points lookup
+#                      is cached for a week). Locations it doesn't cover use classic.
+#   classic            OWM /weather + /forecast (two requests, cached separately).
+# Daily summaries mean the same thing for every provider: aggregate_forecasts() groups the
+# forecast slots by local calendar day (avg/high/low temp, max pop, max sustained wind, mean
+# humidity, most common description). Combined records are cached for FORECAST_TTL, but their
+# current conditions only count as fresh for CURRENT_WEATHER_TTL.
+WEATHER_PROVIDER = os.environ.get("NOMADICSKY_WEATHER_PROVIDER", "onecall").lower()
+ONECALL_PATH = "/data/3.0/onecall"
+NWS_USER_AGENT = os.environ.get("NOMADICSKY_NWS_USER_AGENT", "NomadicSky weather assistant")
+NWS_POINTS_TTL = 7 * 86400
+SECONDS_PER_DAY = 86400
+_EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+# Set after One Call answers 401/403: the API key isn't subscribed, so stop asking
+_onecall_unavailable = threading.Event()
+
+@functools.lru_cache(maxsize=4096)
+def _day_date(day):
+    return datetime.date.fromordinal(_EPOCH_ORDINAL + day).isoformat()
+
+# Function to read the forecast slots out of a classic /forecast payload
+def forecast_slots(payload):
+    return ForecastSeries.from_rows(
+        (entry["dt"], entry["main"]["temp"], entry["weather"][0]["description"], entry.get("pop", 0.0),
+         entry.get("wind", {}).get("speed", 0.0), entry["main"].get("humidity", 0))
+        for entry in payload.get("list", [])
+    )
+
+# Function to summarize a batch of forecasts into per-day statistics grouped by each location's
+# local calendar day, in one pass. Takes (slots, utc_offset) pairs; returns one tuple of
+# DailySummary per pair, so scoring many locations costs one call.
+def aggregate_forecasts(batch):
+    summaries = []
+    for slots, utc_offset in batch:
+        days = {}
+        for dt, temp, description, pop, wind, humidity in slots.rows():
+            day = (dt + utc_offset) // SECONDS_PER_DAY
+            stats = days.get(day)
+            if stats is None:
+                # [temp sum, count, high, low, max pop, max wind, humidity sum, description counts]
+                days[day] = [temp, 1, temp, temp, pop, wind, humidity, Counter((description,))]
+                continue
+            stats[0] += temp
+            stats[1] += 1
+            if temp > stats[2]:
+                stats[2] = temp
+            if temp < stats[3]:
+                stats[3] = temp
+            if pop > stats[4]:
+                stats[4] = pop
+            if wind > stats[5]:
+                stats[5] = wind
+            stats[6] += humidity
+            stats[7][description] += 1
+        summaries.append(tuple(
+            DailySummary(_day_date(day), round(temp_sum / count, 2), round(high, 2), round(low, 2),
+                         descriptions.most_common(1)[0][0], round(pop * 100), round(wind, 1),
+                         round(humidity_sum / count))
+            for day, (temp_sum, count, high, low, pop, wind, humidity_sum, descriptions) in days.items()
+        ))
+    return summaries
+
+def daily_summaries(slots, utc_offset):
+    return aggregate_forecasts([(slots, utc_offset)])[0]
+
+# Function to parse a classic /weather payload into a current-conditions-only record
+def parse_current_payload(payload):
+    return LocationWeather("classic", payload["coord"]["lat"], payload["coord"]["lon"], payload.get("timezone", 0),
+                           CurrentConditions(payload["main"]["temp"], payload["weather"][0]["description"],
+                                             payload["main"].get("humidity"), payload.get("wind", {}).get("speed")))
+
+# Function to parse a classic /forecast payload into a forecast-only record
+def parse_forecast_payload(payload):
+    city = payload.get("city", {})
+    utc_offset = city.get("timezone", 0)
+    slots = forecast_slots(payload)
+    return LocationWeather("classic", city.get("coord", {}).get("lat"), city.get("coord", {}).get("lon"), utc_offset,
+                           slots=slots, daily=daily_summaries(slots, utc_offset))
+
+def _onecall_record(payload):
+    utc_offset = payload.get("timezone_offset", 0)
+    current = payload["current"]
+    rows = [(hour["dt"], hour["temp"], hour["weather"][0]["description"], hour.get("pop", 0.0),
+             hour.get("wind_speed", 0.0), hour.get("humidity", 0)) for hour in payload.get("hourly", [])]
+    # Days inside the hourly range are aggregated from the hourly slots, like every other provider
+    daily = list(daily_summaries(ForecastSeries.from_rows(rows), utc_offset))
+    last_hour = rows[-1][0] if rows else 0
+    if daily and (last_hour + utc_offset) % SECONDS_PER_DAY < 23 * 3600:
+        # The hourly range ends partway through its last day; the daily point covers that day whole
+        daily.pop()
+    covered = {summary.date for summary in daily}
+    for day in payload.get("daily", []):
+        date = _day_date((day["dt"] + utc_offset) // SECONDS_PER_DAY)
+        if date in covered:
+            continue
+        # Beyond the hourly range: the four day-part temperatures stand in for the slots, and
+        # wind_speed (not gust) keeps wind_max a sustained wind
+        temps = [day["temp"][part] for part in ("morn", "day", "eve", "night") if part in day["temp"]] or [day["temp"]["day"]]
+        daily.append(DailySummary(date, round(sum(temps) / len(temps), 2), round(day["temp"].get("max", max(temps)), 2),
+                                  round(day["temp"].get("min", min(temps)), 2), sys.intern(day["weather"][0]["description"]),
+                                  round(day.get("pop", 0.0) * 100), round(day.get("wind_speed", 0.0), 1),
+                                  day.get("humidity", 0)))
+    # Past the hourly range, the daily points (local midday) keep route lookups going
+    rows += [(day["dt"], day["temp"]["day"], day["weather"][0]["description"], day.get("pop", 0.0),
+              day.get("wind_speed", 0.0), day.get("humidity", 0)) for day in payload.get("daily", []) if day["dt"] > last_hour]
+    return LocationWeather("onecall", payload["lat"], payload["lon"], utc_offset,
+                           CurrentConditions(current["temp"], current["weather"][0]["description"],
+                                             current.get("humidity"), current.get("wind_speed")),
+                           ForecastSeries.from_rows(rows), tuple(daily))
+
+def _fetch_onecall(lat, lon):
+    response = provider_client("onecall").get(ONECALL_PATH, params={
+        "lat": lat, "lon": lon, "appid": load_api_key("OPENWEATHERMAP_API_KEY"),
+        "units": "imperial", "exclude": "minutely,alerts"
+    })
+    if response.status_code in (401, 403):
+        _onecall_unavailable.set()
+    if response.status_code != 200:
+        return response.status_code, None
+    return 200, _onecall_record(loads(response.content))
+
+_NWS_HEADERS = {"User-Agent": NWS_USER_AGENT, "Accept": "application/geo+json"}
+_NWS_WIND = re.compile(r"(\d+)(?:\s*to\s*(\d+))?")
+
+def _nws_wind(text):
+    match = _NWS_WIND.search(text or "")
+    return float(match.group(2) or match.group(1)) if match else 0.0
+
+def _fetch_nws(lat, lon, use_cache):
+    client = provider_client("nws")
+    points_key = owm_cache_key("nws-points", lat, lon)
+    points = response_cache.get(points_key) if use_cache else None
+    if points is None:
+        response = client.get(f"/points/{lat:.4f},{lon:.4f}", headers=_NWS_HEADERS)
+        if response.status_code != 200:
+            return response.status_code, None
+        points = {"forecastHourly": loads(response.content)["properties"]["forecastHourly"]}
+        if use_cache:
+            response_cache.set(points_key, points, NWS_POINTS_TTL)
+    response = client.get(points["forecastHourly"], headers=_NWS_HEADERS)
+    if response.status_code != 200:
+        return response.status_code, None
+    periods = loads(response.content)["properties"]["periods"]
+    if not periods:
+        return 404, None
+    utc_offset = int(datetime.datetime.fromisoformat(periods[0]["startTime"]).utcoffset().total_seconds())
+    rows = []
+    for period in periods:
+        temp = period["temperature"]
+        if period.get("temperatureUnit") == "C":
+            temp = temp * 9 / 5 + 32
+        rows.append((int(datetime.datetime.fromisoformat(period["startTime"]).timestamp()), temp,
+                      period["shortForecast"].lower(), ((period.get("probabilityOfPrecipitation") or {}).get("value") or 0) / 100,
+                      _nws_wind(period.get("windSpeed")), (period.get("relativeHumidity") or {}).get("value") or 0))
+    slots = ForecastSeries.from_rows(rows)
+    current = slots[0]
+    return 200, LocationWeather("nws", lat, lon, utc_offset,
+                                CurrentConditions(current.temp, current.description, current.humidity, current.wind),
+                                slots, daily_summaries(slots, utc_offset))
+
+def _active_provider():
+    if WEATHER_PROVIDER == "onecall" and _onecall_unavailable.is_set():
+        return "classic"
+    return WEATHER_PROVIDER if WEATHER_PROVIDER in ("onecall", "nws") else "classic"
+
+# Function to get the HTTP client (and so the rate limit and daily quota) behind the active provider
+def active_provider_client():
+    provider = _active_provider()
+    return provider_client("openweathermap" if provider == "classic" else provider)
+
+def _get_classic(lat, lon, current, forecast, use_cache, refresh):
+    weather = outlook = None
+    if current:
+        status, weather = fetch_owm_json("weather", lat, lon, CURRENT_WEATHER_TTL, use_cache=use_cache,
+                                         refresh=refresh, parse=parse_current_payload)
+        if status != 200:
+            return status, None
+    if forecast:
+        status, outlook = fetch_owm_json("forecast", lat, lon, FORECAST_TTL, use_cache=use_cache,
+                                         refresh=refresh, parse=parse_forecast_payload)
+        if status != 200:
+            return status, None
+    if outlook is None:
+        return 200, weather
+    return 200, LocationWeather("classic", lat, lon, outlook.utc_offset, weather.current if weather else None,
+                                outlook.slots, outlook.daily)
+
+# Function to get the weather record for a coordinate pair. Returns (status, record).
+# current/forecast say which parts the caller needs. With a combined provider one request
+# fills both, so a forecast lookup also answers a later current-weather lookup. A
+# current-only lookup is also answered by a cached classic /weather response (geocoding
+# leaves one behind). Pass combined=False for current-only lookups in large fan-outs (the
+# warm-places search) to make the lighter classic /weather request instead of a combined one.
+# With classic, only the endpoints for the parts needed are requested.
+def get_location_weather(lat, lon, use_cache=True, refresh=False, combined=True, current=True, forecast=True):
+    use_cache = use_cache and not RESPONSE_CACHE_DISABLED
+    provider = _active_provider()
+    if provider == "classic":
+        return _get_classic(lat, lon, current, forecast, use_cache, refresh)
+    key = owm_cache_key(f"location-{provider}", lat, lon)
+    if use_cache and not refresh:
+        record = response_cache.get(key)
+        if record is not None and current and FORECAST_TTL - response_cache.ttl_remaining(key) > CURRENT_WEATHER_TTL:
+            # The forecast is still good, but the current conditions in it are stale
+            record = None
+        record_cache_lookup("location", record is not None)
+        if record is not None:
+            return 200, record
+        if not forecast and response_cache.ttl_remaining(owm_cache_key("weather", lat, lon)) > 0:
+            return _get_classic(lat, lon, True, False, use_cache, refresh)
+    if not combined:
+        return _get_classic(lat, lon, current, False, use_cache, refresh)
+    try:
+        status, record = _fetch_onecall(lat, lon) if provider == "onecall" else _fetch_nws(lat, lon, use_cache)
+    except ProviderQuotaExceeded:
+        # The provider's daily quota is used up; the classic endpoints are counted separately
+        return _get_classic(lat, lon, current, forecast, use_cache, refresh)
+    except requests.RequestException as exc:
+        return f"network error ({type(exc).__name__})", None
+    if status != 200:
+        # No subscription, or outside NWS coverage: the classic endpoints still work
+        if status in (401, 403, 404):
+            return _get_classic(lat, lon, current, forecast, use_cache, refresh)
+        return status, None
+    if use_cache:
+        response_cache.set(key, record, FORECAST_TTL)
+    return 200, record
+
+# Seconds until get_location_weather() would have to fetch again for this point: for its
+# forecast if combined, otherwise for its current conditions
+def location_ttl_remaining(lat, lon, combined=True):
+    provider = _active_provider()
+    if provider != "classic" and combined:
+        return response_cache.ttl_remaining(owm_cache_key(f"location-{provider}", lat, lon))
+    return response_cache.ttl_remaining(owm_cache_key("forecast" if combined else "weather", lat, lon))
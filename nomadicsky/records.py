@@ -0,0 +1,176 @@
+import json
+import sys
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+
+try:
+    import orjson
+except ImportError:  # optional: faster JSON decode/encode when installed
+    orjson = None
+
+# Compact weather record types. Provider responses are parsed straight into these, keeping
+# only the fields the tools use, and the response cache holds them instead of the parsed
+# JSON bodies. Forecast slots are stored column-wise in arrays, and repeated condition
+# descriptions are interned, so a cached location costs a few KB however many slots it has.
+# Tools still return plain dicts (as_dict()); to_cache()/from_cache() give the nested-list
+# form the on-disk cache stores.
+
+# Function to decode a JSON body (bytes or str), with orjson if it is installed
+def loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+# Function to encode a value as compact JSON text
+def dumps(value):
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+def _description(text):
+    return sys.intern(text.lower())
+
+@dataclass(slots=True)
+class CurrentConditions:
+    temp: float
+    description: str
+    humidity: int
+    wind: float
+
+    def as_dict(self):
+        return {"temp": self.temp, "description": self.description, "humidity": self.humidity, "wind": self.wind}
+
+    def to_cache(self):
+        return [self.temp, self.description, self.humidity, self.wind]
+
+    @classmethod
+    def from_cache(cls, row):
+        return cls(row[0], _description(row[1]), row[2], row[3])
+
+@dataclass(slots=True)
+class ForecastSlot:
+    dt: int
+    temp: float
+    description: str
+    pop: float
+    wind: float
+    humidity: int
+
+# Time-ordered forecast points, one array per field
+class ForecastSeries:
+    __slots__ = ("times", "temps", "descriptions", "pops", "winds", "humidities")
+
+    def __init__(self, times=(), temps=(), descriptions=(), pops=(), winds=(), humidities=()):
+        self.times = array("q", times)
+        self.temps = array("d", temps)
+        self.descriptions = [_description(text) for text in descriptions]
+        self.pops = array("d", pops)
+        self.winds = array("d", winds)
+        self.humidities = array("H", map(int, humidities))
+
+    # rows: (dt, temp, description, pop, wind, humidity) tuples, in time order
+    @classmethod
+    def from_rows(cls, rows):
+        rows = list(rows)
+        if not rows:
+            return cls()
+        return cls(*zip(*rows))
+
+    def __len__(self):
+        return len(self.times)
+
+    def __eq__(self, other):
+        return isinstance(other, ForecastSeries) and self.to_cache() == other.to_cache()
+
+    def __getitem__(self, index):
+        return ForecastSlot(self.times[index], self.temps[index], self.descriptions[index],
+                            self.pops[index], self.winds[index], self.humidities[index])
+
+    def rows(self):
+        return zip(self.times, self.temps, self.descriptions, self.pops, self.winds, self.humidities)
+
+    # Function to find the slot closest to a UTC timestamp, or None if it is more than window seconds
+    # outside the series
+    def nearest(self, timestamp, window):
+        times = self.times
+        if not times or timestamp < times[0] - window or timestamp > times[-1] + window:
+            return None
+        index = bisect_left(times, timestamp)
+        # On a tie the earlier slot wins
+        if index == len(times) or (index and timestamp - times[index - 1] <= times[index] - timestamp):
+            index -= 1
+        return self[index]
+
+    def to_cache(self):
+        return [self.times.tolist(), self.temps.tolist(), self.descriptions, self.pops.tolist(),
+                self.winds.tolist(), self.humidities.tolist()]
+
+    @classmethod
+    def from_cache(cls, columns):
+        return cls(*columns)
+
+@dataclass(slots=True)
+class DailySummary:
+    date: str
+    avg_temp: float
+    high_temp: float
+    low_temp: float
+    description: str
+    precip_probability: int
+    wind_max: float
+    humidity_avg: int
+
+    def as_dict(self):
+        return {"date": self.date, "avg_temp": self.avg_temp, "high_temp": self.high_temp,
+                "low_temp": self.low_temp, "description": self.description,
+                "precip_probability": self.precip_probability, "wind_max": self.wind_max,
+                "humidity_avg": self.humidity_avg}
+
+    def to_cache(self):
+        return [self.date, self.avg_temp, self.high_temp, self.low_temp, self.description,
+                self.precip_probability, self.wind_max, self.humidity_avg]
+
+    @classmethod
+    def from_cache(cls, row):
+        row = list(row)
+        row[4] = _description(row[4])
+        return cls(*row)
+
+# Weather for one location: current conditions (None for forecast-only records), forecast
+# slots and per-day summaries in local time. utc_offset is in seconds.
+@dataclass(slots=True)
+class LocationWeather:
+    provider: str
+    lat: float
+    lon: float
+    utc_offset: int
+    current: CurrentConditions = None
+    slots: ForecastSeries = None
+    daily: tuple = ()
+
+    def __post_init__(self):
+        if self.slots is None:
+            self.slots = ForecastSeries()
+
+    def to_cache(self):
+        return [self.provider, self.lat, self.lon, self.utc_offset,
+                self.current.to_cache() if self.current is not None else None,
+                self.slots.to_cache(), [day.to_cache() for day in self.daily]]
+
+    @classmethod
+    def from_cache(cls, row):
+        provider, lat, lon, utc_offset, current, slots, daily = row
+        return cls(provider, lat, lon, utc_offset,
+                   CurrentConditions.from_cache(current) if current is not None else None,
+                   ForecastSeries.from_cache(slots), tuple(DailySummary.from_cache(day) for day in daily))
+
+# Cache bodies are tagged so typed records come back as records: ["location", row] or ["json", value]
+def encode_cache_value(value):
+    if isinstance(value, LocationWeather):
+        return dumps(["location", value.to_cache()])
+    return dumps(["json", value])
+
+def decode_cache_value(body):
+    kind, value = loads(body)
+    return LocationWeather.from_cache(value) if kind == "location" else value
@@ -0,0 +1,187 @@
+import datetime
+import json
+import os
+import re
+import time
+
+from .fanout import fetch_many, run_tool_async
+from .geocoding import distance_miles, geocode_city, weather_cell
+from .memo import memoized_tool
+from .providers import get_location_weather
+from .telemetry import traced_tool
+
+# Route weather for RV trips. The route (waypoints or a polyline) is sampled every
+# ROUTE_SAMPLE_MILES, samples falling in the same forecast cell share one cached weather
+# record, and each sample is matched to the forecast slot closest to its estimated
+# arrival time. Distances are straight-line, scaled by ROUTE_ROAD_FACTOR for driving time.
+ROUTE_SAMPLE_MILES = float(os.environ.get("NOMADICSKY_ROUTE_SAMPLE_MILES", 50))
+ROUTE_MAX_SAMPLES = int(os.environ.get("NOMADICSKY_ROUTE_MAX_SAMPLES", 60))
+ROUTE_AVG_SPEED_MPH = float(os.environ.get("NOMADICSKY_ROUTE_SPEED_MPH", 55))
+ROUTE_MIN_SPEED_MPH = 1.0
+ROUTE_MAX_SPEED_MPH = 120.0
+ROUTE_ROAD_FACTOR = 1.2
+FORECAST_CELL_DEGREES = 0.5
+FORECAST_SLOT_SECONDS = 3 * 3600
+
+_DEPART_PATTERN = re.compile(
+    r"(?:depart(?:ing|ure)?|leav(?:e|ing))\s*(?:at|on)?\s*(\d{4}-\d{2}-\d{2}(?:[ T]\d{1,2}:\d{2})?)", re.IGNORECASE
+)
+
+# Function to parse route input: JSON ({"waypoints": [...]} or {"polyline": [[lat, lon], ...]},
+# optional "depart" and "speed_mph") or text like "Knoxville -> Nashville -> Memphis, depart 2025-06-04 08:00"
+def parse_route_input(route_input):
+    route_input = route_input.strip()
+    if route_input.startswith("{"):
+        try:
+            spec = json.loads(route_input)
+        except json.JSONDecodeError:
+            return {"error": "Route JSON could not be parsed."}
+        if not isinstance(spec, dict):
+            return {"error": "Route JSON must be an object with \"waypoints\" or \"polyline\"."}
+        speed_mph = spec.get("speed_mph", ROUTE_AVG_SPEED_MPH)
+        try:
+            # JSON true/false would otherwise read as 1 and 0 mph
+            speed_mph = float("nan") if isinstance(speed_mph, bool) else float(speed_mph)
+        except (TypeError, ValueError):
+            speed_mph = float("nan")
+        if not ROUTE_MIN_SPEED_MPH <= speed_mph <= ROUTE_MAX_SPEED_MPH:
+            return {"error": f"speed_mph must be a number from {ROUTE_MIN_SPEED_MPH:.0f} to {ROUTE_MAX_SPEED_MPH:.0f}."}
+        depart = spec.get("depart")
+        if depart is not None and not isinstance(depart, str):
+            return {"error": "depart must be a string like \"2025-06-04 08:00\"."}
+        polyline = spec.get("polyline")
+        if polyline:
+            try:
+                polyline = [(float(lat), float(lon)) for lat, lon in polyline]
+            except (TypeError, ValueError):
+                return {"error": "The polyline must be a list of [lat, lon] pairs."}
+            if any(not (-90 <= lat <= 90 and -180 <= lon <= 180) for lat, lon in polyline):
+                return {"error": "Polyline points must be valid latitudes and longitudes."}
+        waypoints = spec.get("waypoints", [])
+        if not isinstance(waypoints, list) or not all(isinstance(waypoint, str) for waypoint in waypoints):
+            return {"error": "Waypoints must be a list of place names."}
+        return {"waypoints": waypoints, "polyline": polyline, "depart": depart, "speed_mph": speed_mph}
+    depart = None
+    match = _DEPART_PATTERN.search(route_input)
+    if match:
+        depart = match.group(1)
+        route_input = route_input[:match.start()]
+    parts = re.split(r"\s*(?:->|→|;|\bto\b|\bthen\b)\s*", route_input.strip(" ,.;"), flags=re.IGNORECASE)
+    return {"waypoints": [part.strip(" ,") for part in parts if part.strip(" ,")], "polyline": None,
+            "depart": depart, "speed_mph": ROUTE_AVG_SPEED_MPH}
+
+# Function to place samples every spacing miles along a polyline, as (lat, lon, mile, leg index)
+def sample_route(points, spacing):
+    samples = [(points[0][0], points[0][1], 0.0, 0)]
+    travelled = 0.0
+    next_mark = spacing
+    for leg, (start, end) in enumerate(zip(points, points[1:])):
+        length = distance_miles(start[0], start[1], end[0], end[1])
+        while length and next_mark <= travelled + length:
+            fraction = (next_mark - travelled) / length
+            samples.append((start[0] + (end[0] - start[0]) * fraction,
+                            start[1] + (end[1] - start[1]) * fraction, next_mark, leg))
+            next_mark += spacing
+        travelled += length
+        if samples[-1][2] < travelled:
+            samples.append((end[0], end[1], travelled, leg))
+    return samples, travelled
+
+# Function to find the forecast slot nearest a UTC timestamp, or None if it's outside the forecast
+def nearest_forecast_slot(slots, timestamp):
+    return slots.nearest(timestamp, FORECAST_SLOT_SECONDS)
+
+# Function to fetch weather along an RV route for the estimated arrival time at each point
+@traced_tool
+@memoized_tool
+def get_route_weather(route_input):
+    spec = parse_route_input(route_input)
+    if "error" in spec:
+        return spec
+    if spec["polyline"]:
+        points = spec["polyline"]
+        labels = [f"{lat:.2f},{lon:.2f}" for lat, lon in (points[0], points[-1])]
+        stops = [(labels[0], 0), (labels[1], len(points) - 1)]
+    else:
+        if len(spec["waypoints"]) < 2:
+            return {"error": "Please provide at least two waypoints (e.g., 'Knoxville -> Nashville -> Memphis')."}
+        geos = fetch_many(geocode_city, spec["waypoints"])
+        for waypoint, geo in zip(spec["waypoints"], geos):
+            if "error" in geo:
+                return {"error": f"Could not find coordinates for {waypoint}: {geo.get('status', geo['error'])}"}
+        points = [(geo["lat"], geo["lon"]) for geo in geos]
+        stops = [(geo["city"], index) for index, geo in enumerate(geos)]
+    if len(points) < 2:
+        return {"error": "A route needs at least two points."}
+
+    point_miles = [0.0]
+    for start, end in zip(points, points[1:]):
+        point_miles.append(point_miles[-1] + distance_miles(start[0], start[1], end[0], end[1]))
+    total_miles = point_miles[-1]
+    spacing = max(ROUTE_SAMPLE_MILES, total_miles / ROUTE_MAX_SAMPLES)
+    samples, total_miles = sample_route(points, spacing)
+
+    # One forecast per cell, fetched concurrently
+    cells = list(dict.fromkeys(weather_cell(lat, lon, FORECAST_CELL_DEGREES) for lat, lon, _, _ in samples))
+    results = fetch_many(lambda cell: get_location_weather(cell[0], cell[1], current=False), cells)
+    forecasts = {}
+    for cell, result in zip(cells, results):
+        # A fetch that raised comes back as an {"error"} dict rather than (status, record)
+        if isinstance(result, dict):
+            return {"error": f"Error fetching forecast along the route: {result['error']}"}
+        status, record = result
+        if status != 200:
+            return {"error": f"Error fetching forecast along the route: {status}"}
+        forecasts[cell] = record
+
+    # Departure is read as local time at the start of the route; default is now
+    start_offset = forecasts[cells[0]].utc_offset
+    if spec["depart"]:
+        try:
+            depart_local = datetime.datetime.fromisoformat(spec["depart"].replace(" ", "T"))
+        except ValueError:
+            return {"error": f"Could not read departure time '{spec['depart']}'. Use YYYY-MM-DD HH:MM."}
+        depart = depart_local.replace(tzinfo=datetime.timezone.utc).timestamp() - start_offset
+    else:
+        depart = time.time()
+    hours_per_mile = ROUTE_ROAD_FACTOR / spec["speed_mph"]
+
+    def local_time(timestamp, offset):
+        return datetime.datetime.fromtimestamp(timestamp + offset, datetime.timezone.utc).strftime("%Y-%m-%d %H:%M")
+
+    route_samples = []
+    for lat, lon, mile, leg in samples:
+        cell = weather_cell(lat, lon, FORECAST_CELL_DEGREES)
+        eta = depart + mile * hours_per_mile * 3600
+        offset = forecasts[cell].utc_offset
+        sample = {"mile": round(mile), "leg": f"{stops[0][0]} -> {stops[-1][0]}" if spec["polyline"] else
+                  f"{stops[leg][0]} -> {stops[leg + 1][0]}", "eta": local_time(eta, offset)}
+        slot = nearest_forecast_slot(forecasts[cell].slots, eta)
+        if slot is None:
+            sample["note"] = "beyond the forecast"
+        else:
+            sample.update({"temp": slot.temp, "description": slot.description,
+                           "precip_probability": round(slot.pop * 100), "wind": slot.wind})
+        route_samples.append(sample)
+
+    # Daily summary for the arrival day at each stop, from the same forecast aggregation
+    stop_summaries = []
+    for name, point_index in stops:
+        lat, lon = points[point_index]
+        cell = weather_cell(lat, lon, FORECAST_CELL_DEGREES)
+        eta = depart + point_miles[point_index] * hours_per_mile * 3600
+        arrival = local_time(eta, forecasts[cell].utc_offset)
+        day = next((summary for summary in forecasts[cell].daily if summary.date == arrival[:10]), None)
+        stop_summaries.append({"city": name, "eta": arrival, "arrival_day": day.as_dict() if day else None})
+
+    return {
+        "route": [name for name, _ in stops],
+        "depart": local_time(depart, start_offset),
+        "distance_miles": round(total_miles),
+        "stops": stop_summaries,
+        "samples": route_samples,
+        "forecast_requests": len(cells)
+    }
+
+async def aget_route_weather(route_input):
+    return await run_tool_async(get_route_weather, route_input)
@@ -0,0 +1,96 @@
+import os
+import re
+
+from .fanout import run_tool_async
+from .geocoding import geocode_city
+from .historical import get_historical_weather
+from .places import format_warm_places, search_warm_places
+from .preference_tools import get_user_preferences, update_user_preferences
+from .weather import get_current_weather, get_weather_forecast
+
+# Deterministic fast path: well-formed queries with one clear intent are answered by calling
+# the tool functions directly, without an LLM round trip. route_query() returns None for
+# anything it isn't sure about, and those queries go to the agent as before: input the tools
+# would reject (an unknown city, an unsupported preference) is deferred, not answered with an
+# error, and so is every query whose tool call fails (a provider error or outage), whatever its
+# intent, so the agent can retry or explain.
+FAST_PATH_ENABLED = os.environ.get("NOMADICSKY_FAST_PATH", "1") not in ("", "0", "false")
+
+_CITY = r"([a-z][a-z .,'-]*?)"
+_MONTH = r"(january|february|march|april|may|june|july|august|september|october|november|december)"
+_FAST_PATH_PATTERNS = [
+    ("preferences", re.compile(r"^(?:what are|show|list) my preferences$")),
+    ("preferred_cities", re.compile(r"^what(?:'s| is) the (?:weather|forecast)(?: like)? (?:in|for) my preferred cities(?: this week)?$")),
+    ("current", re.compile(rf"^(?:what(?:'s| is) the |how(?:'s| is) the )?(?:current )?weather(?: like)? (?:in|for|at) {_CITY}(?: (?:right )?now| today)?$")),
+    ("forecast", re.compile(rf"^what(?:'s| is) the (?:5-day |five-day )?forecast (?:for|in) {_CITY}$")),
+    ("historical", re.compile(rf"^what (?:were|are|was|is) the average (?:highs and lows|high and low temperatures?) (?:in|for) {_CITY} in {_MONTH}(?: (\d{{4}}))?$")),
+    ("warm_places", re.compile(r"^(?:find|show me|where are(?: some)?) warm places\b.*$")),
+    # Only the forms update_user_preferences understands
+    ("set_condition", re.compile(r"^i like (sunny|cloudy|rainy|clear) weather$")),
+    ("set_temperature", re.compile(r"^i prefer (warm|cool|cold) weather$")),
+    ("set_city", re.compile(rf"^i like {_CITY}$")),
+]
+# Words that mean a "city" capture is really a compound or relative query
+_AMBIGUOUS_WORDS = re.compile(r"\b(?:and|or|vs|versus|compare|my|tomorrow|week|weekend|next|last|yesterday|tonight|this|morning|afternoon|evening|weather)\b")
+
+def _format_forecast(result):
+    lines = [f"Here's the 5-day forecast for {result['city']}:"]
+    for day in result["forecast"]:
+        line = (f"- {day['date']}: Avg {day['avg_temp']}°F (High {day['high_temp']}°F, Low {day['low_temp']}°F), "
+                f"{day['description']}")
+        if day.get("precip_probability", 0) >= 30:
+            line += f", {day['precip_probability']}% chance of precipitation"
+        lines.append(line)
+    return "\n".join(lines)
+
+# Function to answer a single-intent query directly, or return None to defer to the agent
+def route_query(query, user_id=None):
+    if not FAST_PATH_ENABLED:
+        return None
+    original = " ".join(query.split()).rstrip("?.! ")
+    text = original.lower()
+    for intent, pattern in _FAST_PATH_PATTERNS:
+        match = pattern.match(text)
+        if not match:
+            continue
+        if intent == "preferences":
+            return get_user_preferences("What are my preferences?", user_id)
+        if intent == "preferred_cities":
+            return get_user_preferences(query, user_id)
+        if intent == "warm_places":
+            # An area we can't place ("near the coast") is for the agent to interpret
+            result = search_warm_places(query)
+            return None if "error" in result else format_warm_places(result)
+        if intent == "set_condition":
+            return update_user_preferences(f"I like {match.group(1)} weather", user_id)
+        if intent == "set_temperature":
+            return update_user_preferences(f"I prefer {match.group(1)} weather", user_id)
+        city = original[match.start(1):match.end(1)].strip(" ,")
+        if not city or _AMBIGUOUS_WORDS.search(city.lower()):
+            return None
+        # Not a place we can find: maybe not a place at all, so let the agent read it
+        if "error" in geocode_city(city):
+            return None
+        if intent == "set_city":
+            # update_user_preferences matches on the original capitalization
+            return update_user_preferences(f"I like {city}", user_id)
+        if intent == "current":
+            result = get_current_weather(city)
+            if "error" in result:
+                return None
+            return f"It's currently {result['temp']}°F with {result['description']} in {result['city']}."
+        if intent == "forecast":
+            result = get_weather_forecast(city)
+            return None if "error" in result else _format_forecast(result)
+        if intent == "historical":
+            location_month = f"{city} {match.group(2)}" + (f" {match.group(3)}" if match.group(3) else "")
+            result = get_historical_weather(location_month)
+            if "error" in result:
+                return None
+            return (f"In {result['month']}, {result['city']} averages highs of {result['avg_high']}°F and lows of "
+                    f"{result['avg_low']}°F ({result['years']}, NOAA station {result['station']}, "
+                    f"{result['station_distance_miles']} miles away).")
+    return None
+
+async def aroute_query(query, user_id=None):
+    return await run_tool_async(route_query, query, user_id)
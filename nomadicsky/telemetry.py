@@ -0,0 +1,361 @@
+import bisect
+import contextlib
+import contextvars
+import functools
+import itertools
+import os
+import threading
+import time
+from collections import deque
+
+# Instrumentation: every tool call, provider request, LLM call and cache lookup is recorded
+# as a span (kind, name, duration, attributes) and turned into counters and latency
+# histograms in a pluggable metrics sink:
+#   NOMADICSKY_TELEMETRY=memory (default)  in-process; prometheus_text() renders it for scraping
+#   NOMADICSKY_TELEMETRY=otel              OpenTelemetry metrics and spans (needs opentelemetry-api)
+#   NOMADICSKY_TELEMETRY=off               no metrics; per-query traces still work
+# Spans also go to the current query's Trace, whose summary() breaks the query down by agent
+# iteration: which LLM calls and tool calls each of the (up to 20) iterations spent time on.
+TELEMETRY_MODE = os.environ.get("NOMADICSKY_TELEMETRY", "memory").lower()
+TELEMETRY_RECENT_SPANS = int(os.environ.get("NOMADICSKY_TELEMETRY_RECENT_SPANS", 1000))
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_span_ids = itertools.count(1)
+current_trace = contextvars.ContextVar("nomadicsky_trace", default=None)
+current_span = contextvars.ContextVar("nomadicsky_span", default=None)
+
+class Span:
+    __slots__ = ("id", "parent_id", "kind", "name", "attributes", "started", "duration")
+
+    def __init__(self, kind, name, attributes=None, parent_id=None):
+        self.id = next(_span_ids)
+        self.parent_id = parent_id
+        self.kind = kind
+        self.name = name
+        self.attributes = attributes or {}
+        self.started = time.time()
+        self.duration = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def to_dict(self):
+        return {"id": self.id, "parent_id": self.parent_id, "kind": self.kind, "name": self.name,
+                "started": self.started, "duration_ms": round((self.duration or 0) * 1000, 2),
+                "attributes": dict(self.attributes)}
+
+# Metrics sinks. The base class discards everything.
+class MetricsSink:
+    def increment(self, name, labels, value=1):
+        pass
+
+    def observe(self, name, value, labels):
+        pass
+
+    def record_span(self, span):
+        pass
+
+class InMemorySink(MetricsSink):
+    def __init__(self, buckets=LATENCY_BUCKETS, recent_spans=TELEMETRY_RECENT_SPANS):
+        self.buckets = buckets
+        self.counters = {}    # (name, labels) -> value
+        self.histograms = {}  # (name, labels) -> [per-bucket counts..., sum, count]
+        self.recent_spans = deque(maxlen=recent_spans)
+        self._lock = threading.Lock()
+
+    def increment(self, name, labels, value=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = [0] * (len(self.buckets) + 2)
+            if value <= self.buckets[-1]:
+                histogram[bisect.bisect_left(self.buckets, value)] += 1
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    def record_span(self, span):
+        self.recent_spans.append(span)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "counters": [{"name": name, "labels": dict(labels), "value": value}
+                             for (name, labels), value in sorted(self.counters.items())],
+                "histograms": [{"name": name, "labels": dict(labels), "count": data[-1], "sum": round(data[-2], 6),
+                                "buckets": dict(zip(self.buckets, itertools.accumulate(data[:-2])))}
+                               for (name, labels), data in sorted(self.histograms.items())],
+            }
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+            self.recent_spans.clear()
+
+    # Prometheus text exposition format
+    def prometheus_text(self):
+        def render(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ""
+            escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"') for _, value in pairs)
+            return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+        lines = []
+        with self._lock:
+            typed = set()
+            for (name, labels), value in sorted(self.counters.items()):
+                if name not in typed:
+                    typed.add(name)
+                    lines.append(f"# TYPE {name} counter")
+                lines.append(f"{name}{render(labels)} {value}")
+            for (name, labels), data in sorted(self.histograms.items()):
+                if name not in typed:
+                    typed.add(name)
+                    lines.append(f"# TYPE {name} histogram")
+                for bound, count in zip(self.buckets, itertools.accumulate(data[:-2])):
+                    lines.append(f"{name}_bucket{render(labels, [('le', bound)])} {count}")
+                lines.append(f"{name}_bucket{render(labels, [('le', '+Inf')])} {data[-1]}")
+                lines.append(f"{name}_sum{render(labels)} {data[-2]}")
+                lines.append(f"{name}_count{render(labels)} {data[-1]}")
+        return "\n".join(lines) + "\n"
+
+class OpenTelemetrySink(MetricsSink):
+    def __init__(self, meter_name="nomadicsky"):
+        from opentelemetry import metrics, trace
+
+        self.meter = metrics.get_meter(meter_name)
+        self.tracer = trace.get_tracer(meter_name)
+        self.instruments = {}
+        self._lock = threading.Lock()
+
+    def _instrument(self, name, factory):
+        with self._lock:
+            if name not in self.instruments:
+                self.instruments[name] = factory(name)
+            return self.instruments[name]
+
+    def increment(self, name, labels, value=1):
+        self._instrument(name, self.meter.create_counter).add(value, labels)
+
+    def observe(self, name, value, labels):
+        self._instrument(name, lambda n: self.meter.create_histogram(n, unit="s")).record(value, labels)
+
+    def record_span(self, span):
+        attributes = {f"nomadicsky.{key}": value for key, value in span.attributes.items()
+                      if isinstance(value, (str, bool, int, float))}
+        otel_span = self.tracer.start_span(f"{span.kind} {span.name}", start_time=int(span.started * 1e9),
+                                           attributes=attributes)
+        otel_span.end(end_time=int((span.started + (span.duration or 0)) * 1e9))
+
+_sink = None
+_sink_lock = threading.Lock()
+
+def telemetry_sink():
+    global _sink
+    with _sink_lock:
+        if _sink is None:
+            if TELEMETRY_MODE == "otel":
+                _sink = OpenTelemetrySink()
+            elif TELEMETRY_MODE in ("off", "none", "0"):
+                _sink = MetricsSink()
+            else:
+                _sink = InMemorySink()
+        return _sink
+
+def set_telemetry_sink(sink):
+    global _sink
+    with _sink_lock:
+        _sink = sink
+
+# Metrics in Prometheus text format, or "" when the sink can't render them
+def prometheus_text():
+    sink = telemetry_sink()
+    return sink.prometheus_text() if hasattr(sink, "prometheus_text") else ""
+
+# Per-query trace: the spans and cache lookups recorded while answering one query
+class Trace:
+    def __init__(self, query):
+        self.query = query
+        self.started = time.perf_counter()
+        self.duration = None
+        self.spans = []
+        self.cache = {}
+        self._lock = threading.Lock()
+
+    def add(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def count_cache(self, cache, hit):
+        with self._lock:
+            counts = self.cache.setdefault(cache, {"hits": 0, "misses": 0})
+            counts["hits" if hit else "misses"] += 1
+
+    def summary(self, slowest=5):
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span.started)
+            cache = {name: dict(counts) for name, counts in self.cache.items()}
+        duration = self.duration if self.duration is not None else time.perf_counter() - self.started
+        by_kind = {}
+        tokens = {"input": 0, "output": 0}
+        for span in spans:
+            stats = by_kind.setdefault(span.kind, {"count": 0, "total_ms": 0.0})
+            stats["count"] += 1
+            stats["total_ms"] = round(stats["total_ms"] + (span.duration or 0) * 1000, 2)
+            if span.kind == "llm":
+                tokens["input"] += span.attributes.get("input_tokens", 0)
+                tokens["output"] += span.attributes.get("output_tokens", 0)
+
+        # Agent iterations: each LLM call directly under a query span ("fast_path" or "agent")
+        # starts one, and the tool calls that follow it (until the next LLM call) belong to it
+        queries = []
+        for query_span in (span for span in spans if span.kind == "query"):
+            iterations = []
+            for child in (span for span in spans if span.parent_id == query_span.id):
+                if child.kind == "llm":
+                    iterations.append({"iteration": len(iterations) + 1, "llm_ms": round(child.duration * 1000, 2),
+                                       "tools": []})
+                elif child.kind == "tool" and iterations:
+                    iterations[-1]["tools"].append({"tool": child.name, "ms": round(child.duration * 1000, 2)})
+            queries.append({"query": query_span.attributes.get("query"), "path": query_span.name,
+                            "duration_ms": round(query_span.duration * 1000, 2), "iterations": iterations})
+        return {
+            "query": self.query,
+            "duration_ms": round(duration * 1000, 2),
+            "by_kind": by_kind,
+            "llm_tokens": tokens,
+            "cache": cache,
+            "queries": queries,
+            "slowest": [{"kind": span.kind, "name": span.name, "ms": round(span.duration * 1000, 2)}
+                        for span in sorted((s for s in spans if s.kind != "query"),
+                                           key=lambda s: s.duration, reverse=True)[:slowest]],
+        }
+
+@contextlib.contextmanager
+def start_trace(query):
+    trace = Trace(query)
+    token = current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        trace.duration = time.perf_counter() - trace.started
+        current_trace.reset(token)
+
+# Function to finish a span: add it to its trace and update the counters and histograms
+def record_span(span, trace=None):
+    trace = trace or current_trace.get()
+    if trace is not None:
+        trace.add(span)
+    sink = telemetry_sink()
+    sink.record_span(span)
+    labels = {"name": span.name}
+    for key in ("status", "error"):
+        if key in span.attributes:
+            labels[key] = str(span.attributes[key])
+    sink.increment(f"nomadicsky_{span.kind}_total", labels)
+    sink.observe(f"nomadicsky_{span.kind}_duration_seconds", span.duration or 0, {"name": span.name})
+    if "bytes" in span.attributes:
+        sink.increment(f"nomadicsky_{span.kind}_response_bytes_total", {"name": span.name}, span.attributes["bytes"])
+    for token_type in ("input", "output"):
+        if span.attributes.get(f"{token_type}_tokens"):
+            sink.increment("nomadicsky_llm_tokens_total", {"name": span.name, "type": token_type},
+                           span.attributes[f"{token_type}_tokens"])
+
+@contextlib.contextmanager
+def span(kind, name, **attributes):
+    parent = current_span.get()
+    record = Span(kind, name, attributes, parent.id if parent is not None else None)
+    token = current_span.set(record)
+    started = time.perf_counter()
+    try:
+        yield record
+    except BaseException as exc:
+        record.attributes.setdefault("error", type(exc).__name__)
+        raise
+    finally:
+        record.duration = time.perf_counter() - started
+        current_span.reset(token)
+        record_span(record)
+
+# Decorator recording each call of a tool function as a "tool" span
+def traced_tool(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with span("tool", func.__name__) as record:
+            result = func(*args, **kwargs)
+            if isinstance(result, dict) and "error" in result:
+                record.set(error="tool_error")
+            return result
+    return wrapper
+
+# Function to count an error that is handled rather than raised, e.g. one catalog place that
+# couldn't be looked up; error should be a short code (status, exception type), not a message
+def record_error(component, error):
+    telemetry_sink().increment("nomadicsky_errors_total", {"component": component, "error": str(error)})
+    parent = current_span.get()
+    if parent is not None:
+        parent.attributes[f"{component}_errors"] = parent.attributes.get(f"{component}_errors", 0) + 1
+
+def record_cache_lookup(cache, hit):
+    telemetry_sink().increment("nomadicsky_cache_lookups_total", {"cache": cache, "result": "hit" if hit else "miss"})
+    trace = current_trace.get()
+    if trace is not None:
+        trace.count_cache(cache, hit)
+
+# LangChain callback handler recording each LLM call as an "llm" span (duration and tokens).
+# Spans are attached to the trace and span current when the handler is created.
+def llm_callback_handler():
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    trace = current_trace.get()
+    parent = current_span.get()
+
+    class TelemetryCallbackHandler(BaseCallbackHandler):
+        def __init__(self):
+            self.pending = {}
+
+        def _start(self, serialized, run_id, kwargs):
+            params = kwargs.get("invocation_params") or {}
+            model = (params.get("model") or params.get("model_name")
+                     or (serialized or {}).get("kwargs", {}).get("model") or "llm")
+            self.pending[run_id] = (Span("llm", model, {}, parent.id if parent is not None else None),
+                                    time.perf_counter())
+
+        def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+            self._start(serialized, run_id, kwargs)
+
+        def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+            self._start(serialized, run_id, kwargs)
+
+        def _finish(self, run_id, **attributes):
+            pending = self.pending.pop(run_id, None)
+            if pending is None:
+                return
+            record, started = pending
+            record.duration = time.perf_counter() - started
+            record.set(**attributes)
+            record_span(record, trace)
+
+        def on_llm_end(self, response, *, run_id, **kwargs):
+            usage = (response.llm_output or {}).get("token_usage") or {}
+            input_tokens = usage.get("prompt_tokens", 0)
+            output_tokens = usage.get("completion_tokens", 0)
+            if not usage:
+                for generations in response.generations:
+                    for generation in generations:
+                        metadata = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                        input_tokens += metadata.get("input_tokens", 0)
+                        output_tokens += metadata.get("output_tokens", 0)
+            self._finish(run_id, input_tokens=input_tokens, output_tokens=output_tokens)
+
+        def on_llm_error(self, error, *, run_id, **kwargs):
+            self._finish(run_id, error=type(error).__name__)
+
+    return TelemetryCallbackHandler()
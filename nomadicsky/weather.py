@@ -0,0 +1,69 @@
+from .fanout import run_tool_async
+from .geocoding import geocode_city
+from .memo import memoized_tool
+from .preferences import read_user_prefs
+from .providers import get_location_weather
+from .telemetry import traced_tool
+
+# Function to fetch current weather
+@traced_tool
+@memoized_tool
+def get_current_weather(location, use_cache=True):
+    geo = geocode_city(location)
+    if "error" in geo:
+        return {"error": f"Error fetching weather for {location}: {geo['status']}"}
+    status, record = get_location_weather(geo["lat"], geo["lon"], use_cache=use_cache, forecast=False)
+    if status == 200:
+        return {"city": geo["city"], "temp": record.current.temp, "description": record.current.description}
+    else:
+        return {"error": f"Error fetching weather for {location}: {status}"}
+
+# Days in a forecast answer: classic /forecast covers 5 days (6 calendar dates), One Call 8
+FORECAST_DAYS = 6
+
+# Function to fetch the 5-day weather forecast, summarized per local day
+@traced_tool
+@memoized_tool
+def get_weather_forecast(location, use_cache=True):
+    # First, get coordinates for the location
+    geo = geocode_city(location)
+    if "error" in geo:
+        # Suggest preferred cities if available
+        prefs = read_user_prefs()
+        preferred_cities = prefs.get("preferred_cities", [])
+        suggestion = f"Try a different city, like {', '.join(preferred_cities)} if you have any preferred cities set." if preferred_cities else "Try a different city, like 'Knoxville' or 'Tucson'."
+        return {"error": f"Could not find coordinates for {location}: {geo['status']}. {suggestion}"}
+    city = geo["city"]
+
+    # Current conditions come with the forecast from combined providers, so a follow-up
+    # current-weather lookup for the same city is served from the cache
+    status, record = get_location_weather(geo["lat"], geo["lon"], use_cache=use_cache, current=False)
+    if status != 200:
+        return {"error": f"Error fetching forecast for {city}: {status}"}
+
+    if not record.daily:
+        return {"error": f"No forecast data found for {city}."}
+
+    return {"city": city, "forecast": [day.as_dict() for day in record.daily[:FORECAST_DAYS]]}
+
+# Weather condition preferences and the descriptions that count as matching them
+CONDITION_MAPPINGS = {
+    "sunny": ["sunny", "clear"],
+    "cloudy": ["cloudy", "overcast"],
+    "rainy": ["rain", "shower", "drizzle"],
+    "clear": ["clear", "sunny"]
+}
+
+def matches_condition(description, condition_preference):
+    condition_matches = CONDITION_MAPPINGS.get(condition_preference.lower(), [condition_preference.lower()])
+    return any(condition in description.lower() for condition in condition_matches)
+
+# Async versions for async callers. Provider calls still go through the pooled, rate-limited
+# clients, on the dedicated tool pool (fanout.run_tool_async), so the event loop is never
+# blocked and caching, throttling and retries behave exactly as in the sync tools. The current
+# context (e.g. the current user) is carried into the thread.
+async def aget_current_weather(location, use_cache=True):
+    return await run_tool_async(get_current_weather, location, use_cache)
+
+async def aget_weather_forecast(location, use_cache=True):
+    return await run_tool_async(get_weather_forecast, location, use_cache)
@@ -0,0 +1,22 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENWEATHERMAP_API_KEY", "test-key")
+os.environ.setdefault("NOAA_API_KEY", "test-key")
+
+from nomadicsky import bench, providers  # noqa: E402
+
+# Every provider client answered by the simulated providers (no latency, no errors), with
+# caches, stores and preferences isolated in a scratch directory
+@pytest.fixture
+def fake_providers(tmp_path, monkeypatch):
+    transport = bench.FakeProviderTransport(latency=0.0)
+    bench.install_fake_transport(transport, unthrottled=True)
+    bench.isolate_storage(str(tmp_path))
+    monkeypatch.setattr(providers, "WEATHER_PROVIDER", "onecall")
+    providers._onecall_unavailable.clear()
+    yield transport
+    providers._onecall_unavailable.clear()
@@ -0,0 +1,67 @@
+import pytest
+
+from nomadicsky import cache, get_current_weather, get_weather_forecast, providers
+from nomadicsky.cache import ResponseCache, fetch_owm_json, owm_cache_key
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "time", lambda: now[0])
+    return now
+
+def test_entries_expire_after_their_ttl(clock):
+    responses = ResponseCache(10)
+    responses.set("a", {"temp": 70}, ttl=60)
+    clock[0] += 59
+    assert responses.get("a") == {"temp": 70}
+    assert responses.ttl_remaining("a") == pytest.approx(1)
+    clock[0] += 2
+    assert responses.get("a") is None
+    assert responses.ttl_remaining("a") == 0
+    assert responses.stats()["hits"] == 1 and responses.stats()["misses"] == 1
+
+def test_least_recently_used_entry_is_evicted():
+    responses = ResponseCache(2)
+    responses.set("a", 1, 60)
+    responses.set("b", 2, 60)
+    responses.get("a")
+    responses.set("c", 3, 60)
+    assert responses.get("b") is None
+    assert responses.get("a") == 1 and responses.get("c") == 3
+
+def test_disk_cache_round_trips_records(tmp_path, fake_providers):
+    status, record = providers.get_location_weather(35.96, -83.92)
+    assert status == 200
+    path = str(tmp_path / "responses.db")
+    ResponseCache(10, path).set("location", record, 60)
+    ResponseCache(10, path).set("plain", {"forecastHourly": "https://example"}, 60)
+    reopened = ResponseCache(10, path)
+    assert reopened.get("location") == record
+    assert reopened.get("plain") == {"forecastHourly": "https://example"}
+
+def test_fetch_owm_json_serves_repeats_from_the_cache(fake_providers):
+    assert fetch_owm_json("forecast", 35.96, -83.92, 60)[0] == 200
+    assert fetch_owm_json("forecast", 35.96, -83.92, 60)[0] == 200
+    assert fake_providers.counts == {"forecast": 1}
+    assert cache.response_cache.ttl_remaining(owm_cache_key("forecast", 35.96, -83.92)) > 0
+
+def test_disable_cache_bypasses_every_weather_cache(fake_providers, monkeypatch):
+    monkeypatch.setattr(cache, "RESPONSE_CACHE_DISABLED", True)
+    monkeypatch.setattr(providers, "RESPONSE_CACHE_DISABLED", True)
+    monkeypatch.setattr("nomadicsky.geocoding.RESPONSE_CACHE_DISABLED", True)
+    get_weather_forecast("Knoxville")
+    fake_providers.reset_counts()
+    get_weather_forecast("Knoxville")
+    get_current_weather("Knoxville")
+    assert fake_providers.counts == {"onecall": 2}
+    assert cache.response_cache.stats()["size"] == 0
+
+def test_failed_responses_are_not_cached(fake_providers, monkeypatch):
+    monkeypatch.setattr("nomadicsky.http_client.HTTP_MAX_RETRIES", 0)
+    forecast = fake_providers._forecast
+    statuses = [503, 200]
+    monkeypatch.setattr(fake_providers, "_forecast",
+                        lambda params: (503, {"message": "busy"}) if statuses.pop(0) == 503 else forecast(params))
+    assert fetch_owm_json("forecast", 35.96, -83.92, 60) == (503, None)
+    assert fetch_owm_json("forecast", 35.96, -83.92, 60)[0] == 200
+    assert fake_providers.counts == {"forecast": 2}
@@ -0,0 +1,42 @@
+from nomadicsky import geocoding, get_current_weather
+from nomadicsky.geocoding import geocode_city, geocode_stats, normalize_city_key
+
+def test_city_keys_ignore_case_and_spacing():
+    assert normalize_city_key("  Knoxville ,  TN,US ") == "knoxville,tn,us"
+    assert normalize_city_key(" , ") == ""
+
+def test_cities_are_resolved_once_and_kept_on_disk(fake_providers):
+    first = geocode_city("Knoxville")
+    assert "error" not in first
+    assert geocode_city("  KNOXVILLE ") == first
+    assert fake_providers.counts == {"weather": 1}
+    # A new process (empty memory) reads the SQLite cache
+    geocoding._geocode_memory.clear()
+    assert geocode_city("knoxville") == first
+    assert fake_providers.counts == {"weather": 1}
+    assert geocode_stats()["hits"] == 2
+
+def test_unknown_cities_are_cached_until_the_negative_ttl(fake_providers, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(geocoding.time, "time", lambda: now[0])
+    assert geocode_city("Atlantis")["status"] == 404
+    assert geocode_city("atlantis")["status"] == 404
+    assert fake_providers.counts == {"weather": 1}
+    now[0] += geocoding.GEOCODE_NEGATIVE_TTL
+    geocode_city("Atlantis")
+    assert fake_providers.counts == {"weather": 2}
+
+def test_server_errors_are_not_cached(fake_providers, monkeypatch):
+    monkeypatch.setattr("nomadicsky.http_client.HTTP_MAX_RETRIES", 0)
+    weather = fake_providers._weather
+    statuses = [503, 200]
+    monkeypatch.setattr(fake_providers, "_weather",
+                        lambda params: (503, {"message": "busy"}) if statuses.pop(0) == 503 else weather(params))
+    assert geocode_city("Tucson")["status"] == 503
+    assert "error" not in geocode_city("Tucson")
+    assert fake_providers.counts == {"weather": 2}
+
+def test_geocoding_leaves_current_weather_in_the_cache(fake_providers):
+    geocode_city("Denver")
+    assert "error" not in get_current_weather("Denver")
+    assert fake_providers.counts == {"weather": 1}
@@ -0,0 +1,44 @@
+import calendar
+import time
+
+from nomadicsky import get_historical_weather, historical
+from nomadicsky.historical import ensure_station_month, month_settled, noaa_get_all
+
+STATIONS = ["GHCND:USW00000001", "GHCND:USW00000002"]
+
+def test_noaa_get_all_follows_every_page(fake_providers, monkeypatch):
+    monkeypatch.setattr(historical, "NOAA_PAGE_SIZE", 25)
+    status, results = noaa_get_all("/data", {"datasetid": "GHCND", "stationid": STATIONS,
+                                             "startdate": "2023-06-01", "enddate": "2023-06-30"})
+    # 2 stations x 30 days x (TMAX, TMIN), 25 per page
+    assert status == 200 and len(results) == 120
+    assert fake_providers.counts["data"] == 5
+    assert {row["station"] for row in results} == set(STATIONS)
+
+def test_historical_weather_is_answered_from_the_store_once_fetched(fake_providers):
+    first = get_historical_weather("Knoxville June")
+    assert first["years"] == f"{time.gmtime().tm_year - 3}-{time.gmtime().tm_year - 1}"
+    assert first["days"] == 90 and first["avg_high"] > first["avg_low"]
+    fake_providers.reset_counts()
+    assert get_historical_weather("Knoxville June") == first
+    assert fake_providers.counts == {}
+
+def test_months_that_have_not_settled_are_not_marked_covered(fake_providers):
+    now = time.gmtime()
+    assert ensure_station_month(STATIONS, now.tm_year, now.tm_mon) == 200
+    assert ensure_station_month(STATIONS, now.tm_year, now.tm_mon) == 200
+    assert fake_providers.counts["data"] == 2
+    assert ensure_station_month(STATIONS, 2023, 6) == 200
+    assert ensure_station_month(STATIONS, 2023, 6) == 200
+    assert fake_providers.counts["data"] == 3
+
+def test_month_settled_waits_for_late_noaa_rows():
+    june_end = calendar.timegm((2023, 6, 30, 0, 0, 0))
+    assert not month_settled(2023, 6, june_end + 86400)
+    assert not month_settled(2023, 6, june_end + 14 * 86400)
+    assert month_settled(2023, 6, june_end + 15 * 86400)
+
+def test_future_years_are_rejected(fake_providers):
+    result = get_historical_weather(f"Knoxville June {time.gmtime().tm_year + 1}")
+    assert "hasn't happened yet" in result["error"]
+    assert fake_providers.counts == {}
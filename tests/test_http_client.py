@@ -0,0 +1,99 @@
+import pytest
+import requests
+import requests.adapters
+
+from nomadicsky import http_client
+from nomadicsky.http_client import ProviderClient, ProviderQuotaExceeded, TokenBucket
+
+# Answers each request with the next scripted status (or raises it, for exceptions)
+class ScriptedAdapter(requests.adapters.BaseAdapter):
+    def __init__(self, script):
+        super().__init__()
+        self.script = list(script)
+        self.sent = 0
+
+    def send(self, request, **kwargs):
+        self.sent += 1
+        step = self.script.pop(0)
+        if isinstance(step, Exception):
+            raise step
+        status, headers = step if isinstance(step, tuple) else (step, {})
+        response = requests.Response()
+        response.status_code = status
+        response.headers.update(headers)
+        response._content = b"{}"
+        response.request = request
+        response.url = request.url
+        return response
+
+    def close(self):
+        pass
+
+# time.sleep records its delay and moves time.monotonic forward instead of waiting
+@pytest.fixture
+def sleeps(monkeypatch):
+    now = [0.0]
+    slept = []
+
+    def sleep(seconds):
+        slept.append(seconds)
+        now[0] += seconds
+
+    monkeypatch.setattr(http_client.time, "sleep", sleep)
+    monkeypatch.setattr(http_client.time, "monotonic", lambda: now[0])
+    return slept
+
+def client(script):
+    provider = ProviderClient("test", "https://provider.test", concurrency=2, rate=1e9, burst=10)
+    adapter = ScriptedAdapter(script)
+    provider.session.mount("https://", adapter)
+    return provider, adapter
+
+def test_transient_failures_are_retried(sleeps):
+    provider, adapter = client([503, requests.ConnectionError("reset"), 200])
+    assert provider.get("/data").status_code == 200
+    assert adapter.sent == 3 and len(sleeps) == 2
+    stats = provider.get_stats()
+    assert (stats["requests"], stats["retries"], stats["ok"], stats["errors"]) == (3, 2, 1, 2)
+
+def test_the_last_response_comes_back_when_retries_run_out(sleeps, monkeypatch):
+    monkeypatch.setattr(http_client, "HTTP_MAX_RETRIES", 2)
+    provider, adapter = client([503, 503, 429])
+    assert provider.get("/data").status_code == 429
+    assert adapter.sent == 3
+
+def test_network_errors_are_raised_when_retries_run_out(sleeps, monkeypatch):
+    monkeypatch.setattr(http_client, "HTTP_MAX_RETRIES", 1)
+    provider, _ = client([requests.Timeout("slow"), requests.Timeout("slow")])
+    with pytest.raises(requests.Timeout):
+        provider.get("/data")
+
+def test_client_errors_are_not_retried(sleeps):
+    provider, adapter = client([404])
+    assert provider.get("/data").status_code == 404
+    assert adapter.sent == 1 and sleeps == []
+
+def test_backoff_honours_retry_after_and_caps_the_jitter(sleeps):
+    provider, _ = client([(429, {"Retry-After": "3"}), (503, {"Retry-After": "600"}), 200])
+    provider.get("/data")
+    assert sleeps == [3.0, http_client.HTTP_BACKOFF_MAX]
+    for attempt in range(8):
+        assert 0 <= provider._backoff(attempt) <= min(http_client.HTTP_BACKOFF_MAX, http_client.HTTP_BACKOFF_BASE * 2 ** attempt)
+
+def test_token_bucket_waits_for_tokens_after_a_burst(sleeps):
+    bucket = TokenBucket(rate=2, capacity=2)
+    for _ in range(4):
+        bucket.acquire()
+    # Two from the burst, then one every half second
+    assert sleeps == [0.5, 0.5]
+    assert bucket.waited == 1.0 and bucket.used_today == 4
+
+def test_daily_limit_raises_until_the_next_day(sleeps):
+    bucket = TokenBucket(rate=1e9, capacity=10, daily_limit=2)
+    bucket.acquire()
+    bucket.acquire()
+    with pytest.raises(ProviderQuotaExceeded):
+        bucket.acquire()
+    bucket.day = "2000-01-01"
+    bucket.acquire()
+    assert bucket.used_today == 1
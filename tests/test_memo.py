@@ -0,0 +1,81 @@
+import threading
+import time
+
+import pytest
+
+from nomadicsky.memo import ToolMemo, compact_tool_output, memo_scope, memoized_tool, normalize_tool_input
+
+def test_repeat_calls_reuse_the_first_result():
+    memo = ToolMemo()
+    calls = []
+
+    def lookup(city):
+        calls.append(city)
+        return {"city": city}
+
+    first = memo.call("k", lookup, "Knoxville")
+    second = memo.call("k", lookup, "Knoxville")
+    assert first == second == {"city": "Knoxville"}
+    assert calls == ["Knoxville"]
+    assert memo.stats() == {"hits": 1, "misses": 1, "entries": 1}
+
+def test_callers_get_their_own_copy():
+    memo = ToolMemo()
+    memo.call("k", lambda: {"places": []})["places"].append("mutated")
+    assert memo.call("k", lambda: None) == {"places": []}
+
+def test_failures_are_not_remembered():
+    memo = ToolMemo()
+
+    def failing():
+        raise RuntimeError("provider down")
+
+    with pytest.raises(RuntimeError):
+        memo.call("k", failing)
+    assert memo.call("k", lambda: "ok") == "ok"
+
+def test_concurrent_callers_wait_for_the_call_in_flight():
+    memo = ToolMemo()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.05)
+        return "done"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(memo.call("k", slow))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["done"] * 5
+    assert len(calls) == 1
+
+def test_memoized_tool_normalizes_input_within_a_scope():
+    calls = []
+
+    @memoized_tool
+    def forecast(location):
+        calls.append(location)
+        return {"location": location}
+
+    forecast("Knoxville")
+    forecast("Knoxville")
+    assert len(calls) == 2  # no scope: straight through
+    with memo_scope() as memo:
+        forecast("Knoxville, TN")
+        forecast("  knoxville ,tn? ")
+        with memo_scope() as nested:
+            forecast("KNOXVILLE,TN")
+            assert nested is memo
+    assert calls[2:] == ["Knoxville, TN"]
+    with memo_scope():
+        forecast("Knoxville, TN")
+    assert len(calls) == 4  # a new run starts with an empty memo
+
+def test_normalize_and_compact_output():
+    assert normalize_tool_input("  Knoxville , TN?") == "knoxville,tn"
+    assert normalize_tool_input(3) == 3
+    assert compact_tool_output({"city": "Zürich", "temp": 61.5}) == '{"city":"Zürich","temp":61.5}'
+    assert compact_tool_output("plain text") == "plain text"
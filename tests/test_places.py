@@ -0,0 +1,92 @@
+import pytest
+
+from nomadicsky import places, preference_tools, telemetry
+from nomadicsky.places import PlaceIndex, _place, read_place_catalog, search_warm_places
+from nomadicsky.preferences import preference_backend
+from nomadicsky.records import CurrentConditions, LocationWeather
+
+PLACES = [
+    _place("Knoxville", "TN", "US", 35.96, -83.92),
+    _place("Nashville", "TN", "US", 36.16, -86.78),
+    _place("Tucson", "AZ", "US", 32.22, -110.97),
+    _place("Phoenix", "AZ", "US", 33.45, -112.07),
+]
+
+@pytest.fixture
+def catalog(monkeypatch, fake_providers):
+    monkeypatch.setattr(places, "_place_index", PlaceIndex(PLACES))
+    return fake_providers
+
+def weather_by_lon(temps):
+    def fake(lat, lon, **kwargs):
+        temp = temps[round(lon)]
+        if isinstance(temp, Exception):
+            raise temp
+        if temp is None:
+            return 503, None
+        return 200, LocationWeather("test", lat, lon, 0, CurrentConditions(temp, "clear sky", 30, 4))
+    return fake
+
+def test_place_index_within_is_nearest_first_and_bounded():
+    index = PlaceIndex(PLACES)
+    found = index.within(35.96, -83.92, 200)
+    assert [place["name"] for _, place in found] == ["Knoxville", "Nashville"]
+    assert found[0][0] == 0
+    assert index.within(35.96, -83.92, 100)[-1][1]["name"] == "Knoxville"
+
+def test_read_place_catalog_reads_geonames_dumps(tmp_path, monkeypatch):
+    row = ["1", "Tucson", "Tucson", "", "32.22", "-110.97", "P", "PPLA2", "US", "", "AZ", "", "", "", "542629"]
+    small = list(row)
+    small[1], small[14] = "Ajo", "3304"
+    path = tmp_path / "cities.txt"
+    path.write_text("\t".join(row) + "\n" + "\t".join(small) + "\n", encoding="utf-8")
+    monkeypatch.setattr(places, "PLACES_MIN_POPULATION", 5000)
+    assert read_place_catalog(str(path)) == [_place("Tucson", "AZ", "US", 32.22, -110.97)]
+
+def test_warm_places_are_ranked_warmest_first(catalog, monkeypatch):
+    monkeypatch.setattr(places, "get_location_weather", weather_by_lon({-84: 70, -87: 80, -111: 95, -112: 99}))
+    result = search_warm_places("warm places")
+    assert [place["city"] for place in result["places"]] == ["Phoenix,AZ,US", "Tucson,AZ,US", "Nashville,TN,US"]
+    assert result["area"] == ""
+
+def test_a_failing_cell_is_skipped_and_counted(catalog, monkeypatch):
+    telemetry.telemetry_sink().reset()
+    monkeypatch.setattr(places, "get_location_weather",
+                        weather_by_lon({-84: 90, -87: None, -111: RuntimeError("boom"), -112: 99}))
+    result = search_warm_places("warm places")
+    assert [place["city"] for place in result["places"]] == ["Phoenix,AZ,US", "Knoxville,TN,US"]
+    errors = {counter["labels"]["error"]: counter["value"] for counter in telemetry.telemetry_sink().snapshot()["counters"]
+              if counter["name"] == "nomadicsky_errors_total"}
+    assert errors == {"503": 1, "exception": 1}
+
+def test_preferred_city_weather_uses_the_shared_condition_mapping(catalog, monkeypatch):
+    backend = preference_backend()
+    backend.add_city("default", "Knoxville")
+    backend.add_city("default", "Tucson")
+    backend.set_preference("default", "weather_condition_preference", "cloudy")
+    weather = {"Knoxville": ("overcast clouds", 70), "Tucson": ("clear sky", 99)}
+    monkeypatch.setattr(preference_tools, "get_current_weather",
+                        lambda city: {"city": city, "description": weather[city][0], "temp": weather[city][1]})
+    answer = preference_tools.get_user_preferences("What's the weather in my preferred cities?", "default")
+    assert "matching cities:\n- Knoxville: 70°F, overcast clouds\n" in answer
+    assert "- Tucson: 99°F, clear sky (not cloudy)" in answer
+
+def test_corridor_places_are_those_near_any_part_of_the_route():
+    index = PlaceIndex(PLACES + [_place("Memphis", "TN", "US", 35.15, -90.05), _place("Asheville", "NC", "US", 35.6, -82.55)])
+    found = places.corridor_places(index, [(35.96, -83.92), (35.15, -90.05)], 40)
+    assert [place["name"] for _, place in found] == ["Knoxville", "Memphis", "Nashville"]
+    assert found[-1][0] < 40
+
+def test_warm_places_along_a_route(catalog, monkeypatch):
+    monkeypatch.setattr(places, "get_location_weather", weather_by_lon({-84: 80, -87: 85, -111: 95, -112: 99}))
+    result = search_warm_places("Find warm places along the route from Knoxville to Nashville")
+    assert [place["city"] for place in result["places"]] == ["Nashville,TN,US", "Knoxville,TN,US"]
+    assert result["area"].startswith("within 50 miles of the route Knoxville")
+    assert "error" in search_warm_places("warm places along the coast")
+
+def test_stream_warm_places_yields_the_ranking_as_it_changes(catalog, monkeypatch):
+    monkeypatch.setattr(places, "get_location_weather", weather_by_lon({-84: 70, -87: 80, -111: 95, -112: 99}))
+    monkeypatch.setattr(places, "WARM_PLACES_MAX_RESULTS", 2)
+    rankings = [[place["temp"] for place in ranking["places"]] for ranking in places.stream_warm_places("warm places")]
+    assert rankings[-1] == [99, 95]
+    assert all(ranking == sorted(ranking, reverse=True) and len(ranking) <= 2 for ranking in rankings)
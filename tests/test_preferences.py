@@ -0,0 +1,79 @@
+import multiprocessing
+import threading
+
+import pytest
+
+from nomadicsky import preferences
+from nomadicsky.preferences import InMemoryPreferenceBackend, JsonFilePreferenceBackend, SQLitePreferenceBackend
+
+@pytest.fixture(params=["memory", "sqlite", "json"])
+def backend(request, tmp_path, monkeypatch):
+    if request.param == "memory":
+        return InMemoryPreferenceBackend()
+    if request.param == "sqlite":
+        return SQLitePreferenceBackend(str(tmp_path / "prefs.db"))
+    monkeypatch.setattr(preferences, "USER_PREFS_PATH", str(tmp_path / "user_prefs.json"))
+    monkeypatch.setitem(preferences._prefs_cache, "mtime", None)
+    return JsonFilePreferenceBackend()
+
+def test_add_city_dedupes_on_normalized_name(backend):
+    assert backend.add_city("alice", "Knoxville")
+    assert not backend.add_city("alice", "  knoxville ")
+    assert backend.add_city("alice", "Tucson")
+    assert backend.get("alice")["preferred_cities"] == ["Knoxville", "Tucson"]
+
+def test_set_preference(backend):
+    backend.set_preference("alice", "temperature_preference", "warm")
+    prefs = backend.get("alice")
+    assert prefs["temperature_preference"] == "warm"
+    assert prefs["weather_condition_preference"] is None
+
+def test_users_with_city_and_all_cities(backend):
+    backend.add_city("alice", "Knoxville")
+    backend.add_city("bob", "knoxville")
+    backend.add_city("bob", "Tucson")
+    if isinstance(backend, JsonFilePreferenceBackend):
+        # Single-user file: every user ID shares it
+        assert backend.users_with_city("KNOXVILLE") == [preferences.DEFAULT_USER_ID]
+        assert backend.all_cities() == ["Knoxville", "Tucson"]
+        return
+    assert backend.users_with_city("KNOXVILLE") == ["alice", "bob"]
+    assert backend.users_with_city("Tucson") == ["bob"]
+    assert backend.users_with_city("Denver") == []
+    assert sorted(city.lower() for city in backend.all_cities()) == ["knoxville", "tucson"]
+
+def test_users_are_kept_apart(backend):
+    if isinstance(backend, JsonFilePreferenceBackend):
+        pytest.skip("the JSON file backend is single-user")
+    backend.add_city("alice", "Knoxville")
+    assert backend.get("bob")["preferred_cities"] == []
+
+def test_concurrent_writers_keep_every_city(backend):
+    def add_cities(worker):
+        for index in range(10):
+            backend.add_city("alice", f"City {worker}-{index}")
+
+    threads = [threading.Thread(target=add_cities, args=(worker,)) for worker in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(backend.get("alice")["preferred_cities"]) == 40
+
+def _add_cities_in_process(path, worker):
+    preferences.USER_PREFS_PATH = path
+    backend = JsonFilePreferenceBackend()
+    for index in range(10):
+        backend.add_city("default", f"City {worker}-{index}")
+
+def test_json_file_writers_in_separate_processes(tmp_path, monkeypatch):
+    path = str(tmp_path / "user_prefs.json")
+    monkeypatch.setattr(preferences, "USER_PREFS_PATH", path)
+    monkeypatch.setitem(preferences._prefs_cache, "mtime", None)
+    context = multiprocessing.get_context("fork")
+    processes = [context.Process(target=_add_cities_in_process, args=(path, worker)) for worker in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert len(JsonFilePreferenceBackend().get("default")["preferred_cities"]) == 40
@@ -0,0 +1,53 @@
+import threading
+
+from nomadicsky import providers
+from nomadicsky.http_client import provider_client
+from nomadicsky.prewarm import CachePrewarmer
+from nomadicsky.providers import get_location_weather, location_ttl_remaining
+
+KNOXVILLE = (35.96, -83.92)
+
+def limit(monkeypatch, name, rate, daily_limit, used_today=0):
+    bucket = provider_client(name).bucket
+    monkeypatch.setattr(bucket, "rate", rate)
+    monkeypatch.setattr(bucket, "daily_limit", daily_limit)
+    monkeypatch.setattr(bucket, "used_today", used_today)
+
+def test_budget_is_a_share_of_the_active_providers_quota(fake_providers, monkeypatch):
+    limit(monkeypatch, "onecall", 10, 1000)
+    limit(monkeypatch, "nws", 4, None)
+    prewarmer = CachePrewarmer(interval=1800, request_share=0.5)
+    # Half of 1,000 a day over 48 cycles
+    assert prewarmer._request_budget() == (0.2, 10)
+    limit(monkeypatch, "onecall", 10, 1000, used_today=990)
+    assert prewarmer._request_budget() == (0.2, 5)
+    monkeypatch.setattr(providers, "WEATHER_PROVIDER", "nws")
+    assert prewarmer._request_budget() == (0.5, None)
+
+def test_run_once_refreshes_only_what_is_due_within_budget(fake_providers, monkeypatch):
+    limit(monkeypatch, "onecall", 1e9, 48 * 2 * 2)
+    prewarmer = CachePrewarmer(interval=1800, hot_cities=["Knoxville", "Nashville", "Memphis"], include_catalog=False)
+    prewarmer.run_once()
+    assert prewarmer.stats["refreshed"] == 2 and prewarmer.stats["deferred"] == 1
+    assert fake_providers.counts["onecall"] == 2
+    prewarmer.run_once()
+    assert prewarmer.stats["refreshed"] == 3 and prewarmer.stats["fresh"] == 2
+    assert location_ttl_remaining(*KNOXVILLE) > 1800
+
+def test_stop_ends_the_thread_mid_cycle(fake_providers, monkeypatch):
+    monkeypatch.setattr(provider_client("onecall").bucket, "rate", 0.01)
+    prewarmer = CachePrewarmer(interval=3600, hot_cities=["Knoxville", "Nashville"], include_catalog=False).start()
+    while not prewarmer.stats["refreshed"]:
+        threading.Event().wait(0.01)
+    prewarmer.stop(timeout=5)
+    assert not prewarmer._thread.is_alive()
+    # The second city was still waiting for its turn (a 200-second spacing)
+    assert prewarmer.stats["refreshed"] == 1
+
+def test_one_call_quota_falls_back_to_the_classic_endpoints(fake_providers, monkeypatch):
+    limit(monkeypatch, "onecall", 1e9, 1, used_today=1)
+    status, record = get_location_weather(*KNOXVILLE)
+    assert status == 200 and record.provider == "classic"
+    assert "onecall" not in fake_providers.counts
+    assert not provider_client("openweathermap").bucket.daily_limit
+
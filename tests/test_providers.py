@@ -0,0 +1,95 @@
+import time
+
+import pytest
+
+from nomadicsky import cache, get_current_weather, get_weather_forecast, providers
+from nomadicsky.cache import CURRENT_WEATHER_TTL
+from nomadicsky.providers import aggregate_forecasts, daily_summaries
+from nomadicsky.records import ForecastSeries
+from nomadicsky.weather import FORECAST_DAYS
+
+DAY = 86400
+
+def test_daily_summaries_group_by_local_day():
+    # 2024-06-01 00:00 UTC onwards, every 3 hours
+    start = 1717200000
+    series = ForecastSeries.from_rows(
+        (start + hour * 3600, 60 + hour, "clear sky" if hour < 12 else "light rain", hour / 100, hour / 2, 50)
+        for hour in range(0, 24, 3)
+    )
+    utc = daily_summaries(series, 0)
+    assert [day.date for day in utc] == ["2024-06-01"]
+    # Five hours behind UTC, the first two slots fall on the previous local day
+    local = daily_summaries(series, -5 * 3600)
+    assert [day.date for day in local] == ["2024-05-31", "2024-06-01"]
+    evening, today = local
+    assert (evening.avg_temp, evening.high_temp, evening.low_temp) == (61.5, 63, 60)
+    assert today.high_temp == 81 and today.low_temp == 66
+    assert today.description == "light rain"
+    assert today.precip_probability == 21
+    assert today.wind_max == 10.5
+    assert today.humidity_avg == 50
+
+def test_aggregate_forecasts_summarizes_a_batch_in_order():
+    first = ForecastSeries.from_rows([(0, 70, "clear sky", 0, 3, 40)])
+    second = ForecastSeries.from_rows([(0, 50, "snow", 0.9, 12, 90), (DAY, 40, "snow", 0.5, 8, 80)])
+    summaries = aggregate_forecasts([(first, 0), (second, 0), (ForecastSeries(), 0)])
+    assert [len(summary) for summary in summaries] == [1, 2, 0]
+    assert summaries[1][0].avg_temp == 50 and summaries[1][1].date == "1970-01-02"
+
+def test_onecall_daily_summaries_match_the_classic_semantics():
+    offset = -4 * 3600
+    hourly_start = 1717214400  # 2024-06-01 00:00 local
+    payload = {
+        "lat": 35.96, "lon": -83.92, "timezone_offset": offset,
+        "current": {"temp": 70, "weather": [{"description": "clear sky"}], "humidity": 40, "wind_speed": 4},
+        "hourly": [{"dt": hourly_start + hour * 3600, "temp": 60 + hour % 24, "weather": [{"description": "clear sky"}],
+                    "pop": 0.1, "wind_speed": 5 + hour % 3, "humidity": 50} for hour in range(36)],
+        "daily": [{"dt": hourly_start + day * DAY + 12 * 3600, "weather": [{"description": "light rain"}],
+                   "temp": {"morn": 60, "day": 70, "eve": 66, "night": 56, "min": 55, "max": 72},
+                   "pop": 0.6, "wind_speed": 9, "wind_gust": 25, "humidity": 70} for day in range(4)],
+    }
+    record = providers._onecall_record(payload)
+    assert [day.date for day in record.daily] == ["2024-06-01", "2024-06-02", "2024-06-03", "2024-06-04"]
+    first = record.daily[0]
+    # Aggregated from the 24 hourly slots of the first day
+    assert (first.avg_temp, first.high_temp, first.low_temp, first.wind_max) == (71.5, 83, 60, 7.0)
+    # The hourly range stops at noon on day two, so that day comes from its daily point,
+    # with sustained wind rather than the gust
+    second = record.daily[1]
+    assert (second.avg_temp, second.high_temp, second.low_temp) == (63.0, 72, 55)
+    assert second.wind_max == 9 and second.precip_probability == 60
+    # Route lookups still reach past the hourly range
+    assert record.slots.times[-1] == payload["daily"][-1]["dt"]
+
+def test_one_call_without_a_subscription_falls_back_to_classic(fake_providers, monkeypatch):
+    monkeypatch.setattr(fake_providers, "_onecall", lambda params: (401, {"cod": 401, "message": "Invalid API key"}))
+    result = get_weather_forecast("Knoxville")
+    assert len(result["forecast"]) == FORECAST_DAYS
+    assert providers._active_provider() == "classic"
+    assert fake_providers.counts == {"weather": 1, "onecall": 1, "forecast": 1}
+
+@pytest.mark.parametrize("provider, requests", [("onecall", {"onecall": 1}), ("classic", {"forecast": 1})])
+def test_forecast_requests_per_provider(fake_providers, monkeypatch, provider, requests):
+    monkeypatch.setattr(providers, "WEATHER_PROVIDER", provider)
+    get_weather_forecast("Tucson")
+    fake_providers.reset_counts()
+    get_weather_forecast("Denver")
+    assert fake_providers.counts == {"weather": 1, **requests}
+
+def test_current_weather_reuses_the_forecast_record(fake_providers):
+    get_weather_forecast("Denver")
+    fake_providers.reset_counts()
+    assert "error" not in get_current_weather("Denver")
+    assert fake_providers.counts == {}
+
+def test_stale_current_conditions_are_fetched_again(fake_providers, monkeypatch):
+    now = time.time()
+    monkeypatch.setattr(cache.time, "time", lambda: now)
+    get_weather_forecast("Denver")
+    fake_providers.reset_counts()
+    now += CURRENT_WEATHER_TTL + 1
+    get_weather_forecast("Denver")
+    assert fake_providers.counts == {}
+    assert "error" not in get_current_weather("Denver")
+    assert fake_providers.counts == {"onecall": 1}
@@ -0,0 +1,30 @@
+from nomadicsky import providers
+from nomadicsky.records import (CurrentConditions, DailySummary, ForecastSeries, LocationWeather, decode_cache_value,
+                                encode_cache_value)
+
+ROWS = [(0, 60.5, "Clear Sky", 0.0, 5.2, 40), (10800, 62.0, "clear sky", 0.3, 6.1, 45)]
+
+def test_forecast_series_is_columnar_and_interns_descriptions():
+    series = ForecastSeries.from_rows(ROWS)
+    assert len(series) == 2
+    assert series.times.typecode == "q" and series.temps.typecode == "d"
+    assert series.descriptions[0] is series.descriptions[1] == "clear sky"
+    assert series[1].pop == 0.3 and series[1].humidity == 45
+    assert list(series.rows())[0] == (0, 60.5, "clear sky", 0.0, 5.2, 40)
+    assert ForecastSeries.from_cache(series.to_cache()) == series
+    assert len(ForecastSeries.from_rows([])) == 0
+
+def test_location_weather_round_trips_through_the_cache_encoding():
+    day = DailySummary("2024-06-01", 61.2, 62.0, 60.5, "clear sky", 30, 6.1, 42)
+    record = LocationWeather("onecall", 35.96, -83.92, -14400, CurrentConditions(70.0, "haze", 50, 3.0),
+                             ForecastSeries.from_rows(ROWS), (day,))
+    assert decode_cache_value(encode_cache_value(record)) == record
+    forecast_only = LocationWeather("classic", 35.96, -83.92, 0, slots=ForecastSeries.from_rows(ROWS))
+    assert decode_cache_value(encode_cache_value(forecast_only)) == forecast_only
+    assert decode_cache_value(encode_cache_value({"a": [1, 2]})) == {"a": [1, 2]}
+    assert day.as_dict()["precip_probability"] == 30
+
+def test_provider_records_round_trip(fake_providers):
+    status, record = providers.get_location_weather(35.96, -83.92)
+    assert status == 200 and isinstance(record, LocationWeather)
+    assert decode_cache_value(encode_cache_value(record)) == record
@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+from nomadicsky import get_route_weather, route
+from nomadicsky.geocoding import distance_miles
+from nomadicsky.records import ForecastSeries
+from nomadicsky.route import parse_route_input, sample_route
+
+def test_sample_route_places_samples_every_spacing_miles():
+    points = [(35.96, -83.92), (36.16, -86.78), (35.15, -90.05)]
+    samples, total = sample_route(points, 50)
+    legs = distance_miles(*points[0], *points[1]) + distance_miles(*points[1], *points[2])
+    assert total == pytest.approx(legs)
+    assert samples[0] == (35.96, -83.92, 0.0, 0)
+    first_leg = distance_miles(*points[0], *points[1])
+    # Every 50 miles, plus a sample at each waypoint
+    assert [mile for _, _, mile, _ in samples] == [0.0, 50, 100, 150, first_leg, 200, 250, 300, 350, total]
+    assert [leg for _, _, _, leg in samples] == [0] * 5 + [1] * 5
+    assert samples[-1][:2] == (35.15, -90.05)
+
+def test_sample_route_on_a_short_leg_keeps_both_ends():
+    samples, total = sample_route([(35.96, -83.92), (36.0, -84.0)], 50)
+    assert len(samples) == 2 and samples[-1][2] == total
+
+def test_nearest_slot_prefers_the_closest_and_the_earlier_on_a_tie():
+    series = ForecastSeries.from_rows([(0, 60, "clear sky", 0, 5, 40), (3600, 62, "few clouds", 0.2, 6, 45),
+                                       (7200, 65, "light rain", 0.8, 9, 70)])
+    assert series.nearest(1000, 10800).dt == 0
+    assert series.nearest(1800, 10800).dt == 0
+    assert series.nearest(2000, 10800).description == "few clouds"
+    assert series.nearest(-10800, 10800).dt == 0
+    assert series.nearest(7200 + 10800, 10800).dt == 7200
+    assert series.nearest(-10801, 10800) is None
+    assert series.nearest(7200 + 10801, 10800) is None
+    assert ForecastSeries().nearest(0, 10800) is None
+
+@pytest.mark.parametrize("spec, message", [
+    ({"waypoints": ["Knoxville", "Nashville"], "speed_mph": 0}, "speed_mph"),
+    ({"waypoints": ["Knoxville", "Nashville"], "speed_mph": "fast"}, "speed_mph"),
+    ({"waypoints": ["Knoxville", "Nashville"], "speed_mph": True}, "speed_mph"),
+    ({"waypoints": ["Knoxville", "Nashville"], "speed_mph": 1e-300}, "speed_mph"),
+    ({"waypoints": ["Knoxville", "Nashville"], "speed_mph": 500}, "speed_mph"),
+    ({"waypoints": ["Knoxville", "Nashville"], "depart": 20250604}, "depart"),
+    ({"polyline": [[35.9, -83.9], [36.1]]}, "[lat, lon] pairs"),
+    ({"polyline": [[35.9, -83.9], [136.1, -86.7]]}, "valid latitudes"),
+    ({"waypoints": "Knoxville -> Nashville"}, "list of place names"),
+])
+def test_bad_route_json_is_an_error_result(spec, message):
+    result = parse_route_input(json.dumps(spec))
+    assert message in result["error"]
+
+def test_text_route_with_departure():
+    spec = parse_route_input("Knoxville -> Nashville to Memphis, depart 2030-01-01 08:00")
+    assert spec["waypoints"] == ["Knoxville", "Nashville", "Memphis"]
+    assert spec["depart"] == "2030-01-01 08:00"
+
+def test_route_weather_along_a_polyline(fake_providers):
+    result = get_route_weather(json.dumps({"polyline": [[35.96, -83.92], [36.16, -86.78]], "speed_mph": 60}))
+    assert result["distance_miles"] == 160
+    assert [sample["mile"] for sample in result["samples"]] == [0, 50, 100, 150, 160]
+    assert all("temp" in sample for sample in result["samples"])
+    assert fake_providers.counts == {"onecall": result["forecast_requests"]}
+    assert get_route_weather(json.dumps({"polyline": [[35.96, -83.92], [36.16, -86.78]], "speed_mph": 0}))["error"]
+
+def test_a_forecast_fetch_that_raises_is_an_error_result(fake_providers, monkeypatch):
+    def boom(lat, lon, **kwargs):
+        raise RuntimeError("connection reset")
+    monkeypatch.setattr(route, "get_location_weather", boom)
+    result = get_route_weather(json.dumps({"polyline": [[35.96, -83.92], [36.16, -86.78]]}))
+    assert result == {"error": "Error fetching forecast along the route: Error fetching (36.0, -84.0): connection reset"}
@@ -0,0 +1,45 @@
+import pytest
+
+from nomadicsky import route_query
+
+@pytest.mark.parametrize("query", [
+    "I prefer to drive at night",
+    "I like warm weather",
+    "I like Knoxville and Tucson",
+    "What's the weather in Knoxville this afternoon?",
+    "What's the weather in Knoxville tomorrow?",
+    "Find warm places near the coast",
+    "I like Atlantis",
+    "What's the forecast for Atlantis?",
+    "Compare the weather in Knoxville and Tucson",
+    "Should I drive to Tucson?",
+])
+def test_unsure_queries_go_to_the_agent(fake_providers, query):
+    assert route_query(query) is None
+
+@pytest.mark.parametrize("query, expected", [
+    ("What's the weather in Knoxville?", "It's currently"),
+    ("What's the forecast for Tucson?", "Here's the 5-day forecast for Tucson"),
+    ("I like sunny weather", "preferred weather condition to sunny"),
+    ("I prefer cool weather", "temperature preference to cool"),
+    ("I like Denver", "added Denver to your preferred cities"),
+    ("What were the average highs and lows in Knoxville in June?", "In June, Knoxville averages highs"),
+    ("Find warm places near Tucson", "within 300 miles of Tucson"),
+])
+def test_well_formed_queries_are_answered_directly(fake_providers, query, expected):
+    answer = route_query(query, user_id="alice")
+    assert answer is not None and expected in answer
+
+def test_fast_path_can_be_switched_off(fake_providers, monkeypatch):
+    monkeypatch.setattr("nomadicsky.router.FAST_PATH_ENABLED", False)
+    assert route_query("What's the weather in Knoxville?") is None
+
+@pytest.mark.parametrize("tool, query", [
+    ("get_current_weather", "What's the weather in Knoxville?"),
+    ("get_weather_forecast", "What's the forecast for Tucson?"),
+    ("get_historical_weather", "What were the average highs and lows in Knoxville in June?"),
+    ("search_warm_places", "Find warm places near Tucson"),
+])
+def test_tool_failures_go_to_the_agent_for_every_intent(fake_providers, monkeypatch, tool, query):
+    monkeypatch.setattr(f"nomadicsky.router.{tool}", lambda *args: {"error": "Error fetching weather: 503"})
+    assert route_query(query) is None
@@ -0,0 +1,82 @@
+import pytest
+
+from nomadicsky import telemetry
+from nomadicsky.fanout import fetch_many
+from nomadicsky.telemetry import (InMemorySink, Span, Trace, record_cache_lookup, record_error, record_span, span,
+                                  start_trace, traced_tool)
+
+@pytest.fixture
+def sink():
+    previous = telemetry.telemetry_sink()
+    sink = InMemorySink(buckets=(0.1, 1.0))
+    telemetry.set_telemetry_sink(sink)
+    yield sink
+    telemetry.set_telemetry_sink(previous)
+
+def counters(sink):
+    return {(counter["name"], tuple(sorted(counter["labels"].items()))): counter["value"]
+            for counter in sink.snapshot()["counters"]}
+
+def test_spans_nest_and_record_errors(sink):
+    with pytest.raises(ValueError):
+        with span("tool", "outer") as outer:
+            with span("http", "owm", status=200) as inner:
+                pass
+            raise ValueError("bad input")
+    assert inner.parent_id == outer.id
+    assert outer.attributes["error"] == "ValueError"
+    assert counters(sink) == {("nomadicsky_http_total", (("name", "owm"), ("status", "200"))): 1,
+                              ("nomadicsky_tool_total", (("error", "ValueError"), ("name", "outer"))): 1}
+    assert [span.name for span in sink.recent_spans] == ["owm", "outer"]
+
+def test_traced_tool_marks_error_results(sink):
+    @traced_tool
+    def lookup(city):
+        return {"error": f"Could not find {city}"} if city == "Atlantis" else {"city": city}
+
+    lookup("Knoxville")
+    lookup("Atlantis")
+    assert counters(sink) == {("nomadicsky_tool_total", (("name", "lookup"),)): 1,
+                              ("nomadicsky_tool_total", (("error", "tool_error"), ("name", "lookup"))): 1}
+
+def test_record_error_counts_and_marks_the_current_span(sink):
+    with span("tool", "search") as record:
+        record_error("warm_places", 503)
+        record_error("warm_places", "exception")
+    assert record.attributes["warm_places_errors"] == 2
+    assert counters(sink)[("nomadicsky_errors_total", (("component", "warm_places"), ("error", "503")))] == 1
+
+def test_prometheus_text_renders_counters_and_histograms(sink):
+    record = Span("http", 'o"wm', {"status": 200, "bytes": 512})
+    record.duration = 0.05
+    record_span(record)
+    text = sink.prometheus_text()
+    assert "# TYPE nomadicsky_http_total counter" in text
+    assert 'nomadicsky_http_total{name="o\\"wm",status="200"} 1' in text
+    assert 'nomadicsky_http_duration_seconds_bucket{name="o\\"wm",le="0.1"} 1' in text
+    assert 'nomadicsky_http_duration_seconds_bucket{name="o\\"wm",le="+Inf"} 1' in text
+    assert 'nomadicsky_http_response_bytes_total{name="o\\"wm"} 512' in text
+
+def test_trace_summary_groups_tool_calls_by_agent_iteration(sink):
+    with start_trace("What's the weather in Knoxville?") as trace:
+        with span("query", "agent", query="What's the weather in Knoxville?"):
+            with span("llm", "grok", input_tokens=100, output_tokens=20):
+                pass
+            with span("tool", "get_current_weather"):
+                record_cache_lookup("geocode", True)
+            with span("llm", "grok", input_tokens=150, output_tokens=30):
+                pass
+        # Spans from worker threads land in the same trace
+        fetch_many(lambda city: record_cache_lookup("response", False), ["Knoxville", "Tucson"])
+    summary = trace.summary()
+    assert summary["llm_tokens"] == {"input": 250, "output": 50}
+    assert summary["cache"] == {"geocode": {"hits": 1, "misses": 0}, "response": {"hits": 0, "misses": 2}}
+    (query,) = summary["queries"]
+    assert query["path"] == "agent"
+    assert [len(iteration["tools"]) for iteration in query["iterations"]] == [1, 0]
+    assert query["iterations"][0]["tools"][0]["tool"] == "get_current_weather"
+    assert summary["by_kind"]["llm"]["count"] == 2
+
+def test_trace_summary_without_spans():
+    summary = Trace("hello").summary()
+    assert summary["queries"] == [] and summary["slowest"] == [] and summary["by_kind"] == {}